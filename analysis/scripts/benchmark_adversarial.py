@@ -0,0 +1,150 @@
+"""
+benchmark_adversarial.py
+========================
+
+Adversarial‑input benchmark for the rule scanner in
+`compute_policy_scores.py`.
+
+pdftotext often produces very long single‑line paragraphs.  A rule of
+the form ``A.*B`` tries every occurrence of ``A`` against the rest of
+the line and backtracks when ``B`` is missing, which is quadratic in
+the line length.  This script builds worst‑case documents for every
+proximity rule (the first term repeated on a single line with the
+second term absent or out of range), doubles their size several times
+and times `analyse_policy` on each.  It fails if the time ever grows
+faster than linearly (beyond ``--max-growth`` per doubling) or if a
+single document takes longer than ``--max-seconds``, which would mean
+one document could stall a batch run.
+
+Usage
+-----
+
+    python analysis/scripts/benchmark_adversarial.py [--sizes N ...]
+        [--max-growth F] [--max-seconds S] [--legacy]
+
+``--legacy`` also times the equivalent ``A.*B`` regex on the smallest
+input for comparison.
+"""
+
+import argparse
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from compute_policy_scores import RULES, Near, analyse_policy
+
+
+def adversarial_documents(size: int) -> Dict[str, str]:
+    """Return worst‑case single‑line documents of about `size` characters.
+
+    For each proximity rule there is one document repeating a literal
+    instance of its first term with filler words in between, so every
+    occurrence is a candidate but none is followed by the second term
+    within range.
+    """
+    documents = {}
+    for cond, groups in RULES.items():
+        for group, rules in groups.items():
+            for rule in rules:
+                if not isinstance(rule, Near):
+                    continue
+                # A literal instance of the first term (strip \b and
+                # escapes, which are all that the current rules use).
+                term = rule.first.replace(r"\b", "").replace("\\", "")
+                unit = f"{term} " + "filler " * (rule.within + 1)
+                line = unit * (size // len(unit) + 1)
+                documents[f"{cond}.{group}: {rule.first} ~ {rule.second}"] = line[:size]
+    # Every rule at once: all first terms interleaved on one line.
+    documents["all rules"] = "".join(
+        doc[: max(1, size // len(documents))] for doc in list(documents.values())
+    )
+    return documents
+
+
+def time_call(func: Callable[[], object]) -> float:
+    """Return the wall time of one call to `func` in seconds."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check that rule scanning stays linear on adversarial inputs."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[125_000, 250_000, 500_000, 1_000_000, 2_000_000],
+        help="Document sizes in characters (each should double the previous)",
+    )
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=3.0,
+        help="Maximum allowed time ratio between consecutive sizes (default: 3.0)",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=5.0,
+        help="Maximum allowed time for any single document (default: 5.0)",
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Also time the equivalent unbounded A.*B regex on the smallest size",
+    )
+    args = parser.parse_args(argv)
+
+    failures = []
+    timings: Dict[str, List[float]] = {}
+    for size in args.sizes:
+        for name, text in adversarial_documents(size).items():
+            timings.setdefault(name, []).append(time_call(lambda: analyse_policy(text)))
+
+    for name, times in timings.items():
+        cells = ", ".join(
+            f"{size:,}: {seconds * 1000:.1f} ms" for size, seconds in zip(args.sizes, times)
+        )
+        print(f"{name}\n    {cells}")
+        for seconds in times:
+            if seconds > args.max_seconds:
+                failures.append(f"{name}: {seconds:.2f} s exceeds {args.max_seconds} s")
+        for previous, current in zip(times, times[1:]):
+            # Ignore ratios between timings too small to measure reliably.
+            if current > 0.01 and current / max(previous, 1e-9) > args.max_growth:
+                failures.append(
+                    f"{name}: time grew {current / previous:.1f}x for a doubling in size"
+                )
+
+    if args.legacy:
+        size = args.sizes[0]
+        print(f"\nUnbounded A.*B regex at {size:,} characters:")
+        for name, text in adversarial_documents(size).items():
+            if name == "all rules":
+                continue
+            rule = next(
+                r
+                for groups in RULES.values()
+                for rules in groups.values()
+                for r in rules
+                if isinstance(r, Near) and name.endswith(f"{r.first} ~ {r.second}")
+            )
+            legacy = re.compile(f"{rule.first}.*{rule.second}")
+            seconds = time_call(lambda: legacy.search(text))
+            print(f"    {name}: {seconds * 1000:.1f} ms")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"    {failure}")
+        return 1
+    print("\nAll rules scale linearly.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+"""
+benchmark_scoring.py
+====================
+
+Scalability benchmark for `compute_policy_scores.py` on synthetic
+policy corpora.
+
+The script generates a synthetic corpus of English and German policy
+texts (from 10 up to 100k documents) that are seeded with the trigger
+phrases the C1–C8 rules look for and vary in length, including long
+single‑line documents like those pdftotext produces.  It then times
+each stage of the scorer separately:
+
+- ``read``: reading the policy files;
+- ``classify_C1`` … ``classify_C8``: scanning and classifying one
+  condition at a time;
+- ``classify_all``: `analyse_policy` for all conditions at once;
+- ``score``: computing the initial and updated scores;
+- ``write``: writing the CSV/TSV tables;
+- ``main``: an end‑to‑end, uncached run of `main()`.
+
+For every stage the throughput in documents and megabytes per second
+is recorded, together with the peak traced memory of the end‑to‑end
+run and the peak RSS of the process.  Results can be saved as a JSON
+baseline and compared against one later: the comparison fails if the
+throughput of any stage has dropped by more than ``--threshold``.
+
+Usage
+-----
+
+    python analysis/scripts/benchmark_scoring.py [--docs N ...]
+        [--languages en de] [--long-line-share F] [--seed S]
+        [--corpus-dir DIR] [--save-baseline JSON] [--compare JSON]
+        [--threshold F] [--no-memory]
+
+Example: record a baseline, then check a later change against it:
+
+    python analysis/scripts/benchmark_scoring.py --docs 100 1000 \\
+        --save-baseline analysis/outputs/benchmarks/baseline.json
+    python analysis/scripts/benchmark_scoring.py --docs 100 1000 \\
+        --compare analysis/outputs/benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import compute_policy_scores as cps
+
+# Trigger phrases per language and condition.  Each one matches at
+# least one rule in compute_policy_scores.RULES so that the synthetic
+# corpus exercises every classifier.
+TRIGGERS: Dict[str, Dict[str, List[str]]] = {
+    "en": {
+        "C1": [
+            "Authors must deposit their articles in the repository.",
+            "Researchers are required to make their publications openly available.",
+            "Authors should deposit a copy of their work.",
+            "Staff are encouraged to publish in open access journals.",
+        ],
+        "C2": [
+            "Authors may request to opt-out of deposit in exceptional cases.",
+            "Where the publisher imposes an embargo, access is granted upon request.",
+            "There is no opt-out from this policy.",
+            "The policy applies without exception to all staff.",
+        ],
+        "C3": [
+            "The author's accepted manuscript version shall be deposited.",
+            "Where permitted, the version of record should be used.",
+            "Authors may also share a preprint of their work.",
+        ],
+        "C4": [
+            "Deposit is required at the time of acceptance.",
+            "Articles shall be made available upon publication.",
+            "Authors should deposit as soon as possible.",
+        ],
+        "C5": [
+            "An embargo of no more than six months after publication is acceptable.",
+            "Embargo periods of twelve months are tolerated in the humanities.",
+            "The period stipulated by the publisher applies.",
+        ],
+        "C6": [
+            "Copyright will be retained by the authors.",
+            "Authors should retain copyright whenever possible.",
+            "Any agreements must comply with this policy.",
+            "Where copyright is transferred, a licence back is sought.",
+        ],
+        "C7": [
+            "Only deposited works are considered in performance evaluation.",
+            "Deposited publications are used for promotion and tenure decisions.",
+        ],
+        "C8": [
+            "Doctoral theses are also covered by this policy.",
+            "Each dissertation must be deposited in the repository.",
+        ],
+    },
+    "de": {
+        "C1": [
+            "Die Wissenschaftlerinnen und Wissenschaftler sind verpflichtet, ihre Publikationen zu hinterlegen.",
+            "Die Autorinnen und Autoren müssen ihre Artikel zugänglich machen.",
+            "Publikationen sollten im Repositorium veröffentlicht werden.",
+            "Die Hochschule empfehlen eine Zweitveröffentlichung.",
+        ],
+        "C2": [
+            "Ein Verzicht auf Hinterlegung ist nur in begründeten Fällen möglich.",
+            "Es gibt keine Ausnahme von dieser Regelung.",
+        ],
+        "C3": [
+            "Hinterlegt wird die Autorenfassung des Artikels.",
+        ],
+        "C4": [
+            "Die Hinterlegung erfolgt bei Annahme des Manuskripts.",
+            "Die Zweitveröffentlichung erfolgt nach Veröffentlichung im Verlag.",
+            "Die Hinterlegung soll so bald wie möglich erfolgen.",
+        ],
+        "C5": [
+            "Eine Sperrfrist von mehr als 12 Monate ist zu vermeiden.",
+            "Nach einem Jahr wird der Artikel frei zugänglich; ein Jahr Embargo ist üblich.",
+        ],
+        "C6": [
+            "Die Autoren behalten das Recht auf Zweitveröffentlichung.",
+            "Die Rechte sollten behalten werden, wo immer möglich.",
+            "Das Urheberrecht wird an den Verlag übertragen.",
+        ],
+        "C7": [
+            "Die Hinterlegung ist Grundlage der Leistungsbewertung.",
+            "Die Daten werden für Evaluationszwecke genutzt.",
+        ],
+        "C8": [
+            "Die Regelung gilt auch für jede Doktorarbeit und Abschlussarbeit.",
+            "Dissertationen werden ebenfalls erfasst.",
+        ],
+    },
+}
+
+# Neutral words used to pad documents to the desired length.
+FILLER: Dict[str, List[str]] = {
+    "en": (
+        "the university supports open science research results knowledge "
+        "society access infrastructure repository library scholarly "
+        "communication digital publication data strategy members faculty"
+    ).split(),
+    "de": (
+        "die universität unterstützt offene wissenschaft forschung ergebnisse "
+        "wissen gesellschaft zugang infrastruktur bibliothek kommunikation "
+        "digitale publikation daten strategie mitglieder fakultät"
+    ).split(),
+}
+
+
+# Stages faster than this are skipped by --compare.
+MIN_COMPARE_SECONDS = 0.05
+
+
+def filler_sentence(rng: random.Random, language: str) -> str:
+    """Return one random sentence of filler words."""
+    words = rng.choices(FILLER[language], k=rng.randint(8, 20))
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_policy(
+    rng: random.Random, language: str, length: int, single_line: bool
+) -> str:
+    """Return a synthetic policy text of about `length` characters.
+
+    Each condition's triggers are included with probability 0.6, at
+    random positions among filler sentences.  Lines are about 80
+    characters unless `single_line` is set, in which case the whole
+    document is one line.
+    """
+    sentences = []
+    size = 0
+    while size < length:
+        sentence = filler_sentence(rng, language)
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    for phrases in TRIGGERS[language].values():
+        if rng.random() < 0.6:
+            sentences.insert(rng.randrange(len(sentences) + 1), rng.choice(phrases))
+    text = " ".join(sentences)
+    if single_line:
+        return text + "\n"
+    lines = []
+    line: List[str] = []
+    width = 0
+    for word in text.split(" "):
+        if width + len(word) > 80 and line:
+            lines.append(" ".join(line))
+            line, width = [], 0
+        line.append(word)
+        width += len(word) + 1
+    lines.append(" ".join(line))
+    return "\n".join(lines) + "\n"
+
+
+def generate_corpus(
+    directory: Path,
+    n_docs: int,
+    languages: List[str],
+    long_line_share: float,
+    seed: int,
+) -> int:
+    """Write `n_docs` synthetic policies to `directory`; return total characters.
+
+    Document lengths are drawn from a log‑normal distribution (median
+    about 8,000 characters, capped at 400,000), roughly matching the
+    spread of the real corpus with a longer tail.
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for i in range(n_docs):
+        language = rng.choice(languages)
+        length = min(int(rng.lognormvariate(9.0, 0.8)), 400_000)
+        text = synthetic_policy(rng, language, length, rng.random() < long_line_share)
+        sector = "RPO" if i % 3 else "RFO"
+        name = f"XX_{sector}_{i:06d}_Synthetic-{language.upper()}_2024.txt"
+        (directory / name).write_text(text, encoding="utf-8")
+        total += len(text)
+    return total
+
+
+def benchmark_stages(corpus_dir: Path, output_dir: Path) -> Dict[str, float]:
+    """Time each scorer stage over the corpus; return seconds per stage."""
+    timings = {name: 0.0 for name in ["read", "classify_all", "score", "write"]}
+    timings.update({f"classify_{cond}": 0.0 for cond in cps.CLASSIFIERS})
+    rows = []
+    clock = time.perf_counter
+    for file_path in sorted(corpus_dir.glob("*.txt")):
+        start = clock()
+        content = file_path.read_text(encoding="utf-8", errors="ignore")
+        timings["read"] += clock() - start
+        for cond in cps.CLASSIFIERS:
+            start = clock()
+            cps.analyse_policy(content, [cond])
+            timings[f"classify_{cond}"] += clock() - start
+        start = clock()
+        values = cps.analyse_policy(content)
+        timings["classify_all"] += clock() - start
+        start = clock()
+        row = {
+            "policy_file": file_path.name,
+            **values,
+            "initial_score": cps.score_policy(values, cps.INITIAL_WEIGHTS),
+            "updated_score": cps.score_policy(values, cps.UPDATED_WEIGHTS),
+        }
+        timings["score"] += clock() - start
+        rows.append(row)
+    start = clock()
+    cps.write_tables(rows, output_dir / "policy_scores.csv")
+    timings["write"] = clock() - start
+    return timings
+
+
+def run_main(corpus_dir: Path, output_dir: Path) -> None:
+    """Run the scorer's main() on the corpus without cache or console output."""
+    saved = cps.POLICIES_DIR, cps.OUTPUT_CSV
+    cps.POLICIES_DIR = corpus_dir
+    cps.OUTPUT_CSV = output_dir / "policy_scores.csv"
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cps.main(["--no-cache"])
+    finally:
+        cps.POLICIES_DIR, cps.OUTPUT_CSV = saved
+
+
+def benchmark_size(n_docs: int, args: argparse.Namespace, workdir: Path) -> dict:
+    """Generate a corpus of `n_docs` documents and benchmark it."""
+    corpus_dir = (args.corpus_dir or workdir) / f"corpus_{n_docs}"
+    output_dir = workdir / f"output_{n_docs}"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    seed = args.seed + n_docs
+    chars = generate_corpus(corpus_dir, n_docs, args.languages, args.long_line_share, seed)
+    megabytes = chars / 1e6
+
+    timings = benchmark_stages(corpus_dir, output_dir)
+    start = time.perf_counter()
+    run_main(corpus_dir, output_dir)
+    timings["main"] = time.perf_counter() - start
+
+    stages = {
+        name: {
+            "seconds": round(seconds, 6),
+            "docs_per_sec": round(n_docs / seconds, 3) if seconds else None,
+            "mb_per_sec": round(megabytes / seconds, 3) if seconds else None,
+        }
+        for name, seconds in timings.items()
+    }
+    result = {
+        "docs": n_docs,
+        "characters": chars,
+        "seed": seed,
+        "stages": stages,
+    }
+    if args.memory:
+        tracemalloc.start()
+        try:
+            run_main(corpus_dir, output_dir)
+            result["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Return a message for every stage slower than the baseline allows."""
+    regressions = []
+    for size, result in current["sizes"].items():
+        reference = baseline.get("sizes", {}).get(size)
+        if reference is None:
+            continue
+        for stage, stats in result["stages"].items():
+            before = reference["stages"].get(stage, {}).get("docs_per_sec")
+            now = stats["docs_per_sec"]
+            # Stages that take only a few milliseconds are too noisy to compare.
+            if stats["seconds"] < MIN_COMPARE_SECONDS:
+                continue
+            if before and now is not None and now < before * (1 - threshold):
+                regressions.append(
+                    f"{size} docs, {stage}: {now:.1f} docs/s vs baseline "
+                    f"{before:.1f} docs/s ({(1 - now / before) * 100:.0f}% slower)"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the policy scorer on synthetic corpora."
+    )
+    parser.add_argument(
+        "--docs",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="Corpus sizes to benchmark (default: 10 100 1000)",
+    )
+    parser.add_argument(
+        "--languages",
+        nargs="+",
+        choices=sorted(TRIGGERS),
+        default=sorted(TRIGGERS),
+        help="Languages of the synthetic documents",
+    )
+    parser.add_argument(
+        "--long-line-share",
+        type=float,
+        default=0.1,
+        help="Share of documents written as a single line (default: 0.1)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument(
+        "--corpus-dir",
+        type=Path,
+        default=None,
+        help="Keep the generated corpora here instead of a temporary directory",
+    )
+    parser.add_argument("--save-baseline", type=Path, help="Write results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Compare against this JSON baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed throughput drop before --compare fails (default: 0.2)",
+    )
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="Skip the traced-memory run",
+    )
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_docs in args.docs:
+            result = benchmark_size(n_docs, args, Path(tmp))
+            results["sizes"][str(n_docs)] = result
+            print(f"{n_docs} documents ({result['characters'] / 1e6:.1f} MB):")
+            for stage, stats in result["stages"].items():
+                print(
+                    f"    {stage:<13} {stats['seconds']:9.3f} s"
+                    f"  {stats['docs_per_sec'] or 0:10.1f} docs/s"
+                    f"  {stats['mb_per_sec'] or 0:8.2f} MB/s"
+                )
+            if "peak_traced_mb" in result:
+                print(f"    peak traced memory (main): {result['peak_traced_mb']:.1f} MB")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["peak_rss_mb"] = round(rss / (1e6 if sys.platform == "darwin" else 1e3), 3)
+    print(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        with args.save_baseline.open("w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.compare:
+        with args.compare.open("r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Throughput regressions:")
+            for message in regressions:
+                print(f"    {message}")
+            return 1
+        print(f"No stage is more than {args.threshold:.0%} slower than {args.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
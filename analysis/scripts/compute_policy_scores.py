@@ -12,8 +12,15 @@ length, copyright, internal use, and whether the policy also
 applies to theses.
 
 For each condition the script uses a simple set of keyword and
-regular expression rules to extract a numeric value reflecting the
-strength of that condition.  Because institutional policies are
+regular expression rules (``RULES``) to extract a numeric value
+reflecting the strength of that condition.  All rules are compiled
+once into a shared scanner.  Each policy is read into one
+``Document``, which holds its normalised, lower‑cased text (line‑break
+hyphenation joined, whitespace collapsed, ligatures expanded and
+umlauts folded, see `text_normalisation.py`) and, once a proximity
+or sentence rule needs them, the offsets of its word tokens,
+sentences and paragraphs; it is scanned once for every condition's
+patterns and then passed to all eight classifiers.  Because institutional policies are
 written in a variety of styles and languages, these rules are
 necessarily heuristic and will occasionally misclassify passages.
 However, they provide a fully reproducible baseline that can be
@@ -25,28 +32,158 @@ computed that emphasises the conditions empirically shown in the
 paper to be most predictive of deposit behaviour (C2, C4 and C7),
 with the other conditions given zero weight.
 
-The resulting scores are written to a CSV file under
+The corpus is processed as a stream: policy files are discovered,
+read (up to ``--prefetch`` files ahead, in background threads, while
+earlier ones are classified), classified and scored one at a time,
+and each row is written and printed as soon as it is ready.  The
+resulting scores are written to a CSV file under
 `analysis/outputs/tables/policy_scores.csv` and printed to the
 console.  A tab‑separated version (`policy_scores.tsv`) is also
 written to the same directory so that the QA linter can discover
 and validate it automatically.  Policies that cannot be read will be
 skipped with a warning.
 
+Raw condition values are cached on disk per policy, keyed by the
+SHA‑256 of the policy text, so a re‑run only classifies policies
+that are new or changed.  Every cached value also records a
+fingerprint of the rules, bounds and classifier behind its
+condition; editing the rules for one condition therefore only
+re‑classifies that condition.  Scores are always recomputed from
+the raw values, so changing the weights never invalidates the cache.
+The normalised text and segmentation of classified policies are
+cached alongside, also per text digest; normalised texts are read
+back through a memory map.  Fresh values are journaled as soon as they are
+computed, so a run that is interrupted resumes where it stopped:
+the next run serves the finished policies from the cache.
+
 Usage
 -----
 Run this script from the repository root or directly via
 
-    python analysis/scripts/compute_policy_scores.py
+    python analysis/scripts/compute_policy_scores.py [--no-cache]
+        [--cache-size N] [--jobs N] [--prefetch N] [--chunk-size CHARS] [--index]
+        [--snippets] [--columnar {arrow,parquet}] [--profile]
+        [--all-languages] [--watch [--interval SECONDS]] [--shard I/N]
+
+``--no-cache`` ignores and leaves untouched the on‑disk cache.
+``--cache-size`` bounds the number of cached policies (least
+recently used entries are evicted first).  ``--jobs N`` reads and
+classifies policies in N worker processes; the output is identical
+to a serial run.  ``--chunk-size CHARS`` streams each policy through
+overlapping windows instead of loading it whole, so memory use stays
+constant however large a document is.
+
+The rules come in per‑language packs (``RULE_PACKS``).  A policy is
+only scanned with the packs of the languages declared in its
+`policies/metadata` file and of the languages detected in its text
+(``rule_languages``), plus the language‑neutral pack, so adding a
+language does not slow down the others.  ``--all-languages`` applies
+every pack to every policy.  The institution, year and declared
+language from the metadata are joined into the output tables, and
+``rule_languages`` records the packs applied.
+
+``--index`` first updates the full‑text index of `policy_index.py`
+and asks it which policies contain the words each pattern needs; a
+pattern is then only evaluated on those policies.  The results are
+the same as without the index.
+
+``--snippets`` records every rule match during the same scan that
+computes C1–C8 and writes the sentence around it as evidence to
+`snippets/by_policy/<policy ID>/auto_snippets.jsonl`, in the format
+of `templates/snippet_schema.json` with codes from
+`methods/codebook.md` (see ``SNIPPET_CODES``), together with an
+``auto_anchors.csv`` of page and character offsets.  Cached values
+carry no evidence, so with ``--snippets`` every policy is scanned.
+
+``--columnar parquet`` or ``--columnar arrow`` (requires pyarrow)
+also keeps the scores in a typed columnar table,
+`policy_scores.parquet` or `policy_scores.arrow` (Arrow IPC), with
+C1–C8 and both scores as float64.  Only the rows of new or changed
+policies are upserted (keyed by ``policy_file``), removed policies
+are dropped, and the file is left untouched when nothing changed.
+Notebooks can load the Arrow file without copying via
+``pyarrow.ipc.open_file(pyarrow.memory_map(path)).read_all()``.
 
-The script has no command‑line arguments.
+The scorer can also be used as a library: ``score_texts(texts)``
+classifies and scores texts in memory, without reading or writing any
+file, and returns a ``TextScore`` per text.  Importing the module
+does not compile the rules or load PyYAML or pyarrow; the rules are
+compiled on first use.  `scoring_service.py` serves ``score_texts``
+over local HTTP with the rules kept warm.
+
+``--watch`` keeps the script running after the full run, with the
+rules compiled once, and polls `policies/text/` every ``--interval``
+seconds (0.5 by default).  New or changed files are rescored as soon
+as they appear, deleted ones are dropped, and both tables are
+rewritten from the rows held in memory.  Tables are always written to
+a temporary file first and then renamed, so readers never see a
+partial table.
+
+``--shard I/N`` scores only shard I of N of the corpus, for fanning a
+run out over several machines.  Policies are assigned to shards by a
+hash of their ``COUNTRY_SECTOR_ID`` policy ID (`shard_of`), so every
+node computes the same partition without shared state.  Each shard
+writes a partial CSV/TSV pair to `analysis/outputs/tables/shards/`;
+`merge_score_shards.py` combines the shards of all N nodes into
+`policy_scores.csv` and `.tsv`, identical to a single run, and
+validates them with `qa/lint_tables.py`.  ``--shard`` cannot be
+combined with ``--watch`` or ``--columnar``.
+
+``--profile`` records the wall time and call count of file reads,
+each classifier and table writing, and the time, call count and hit
+count (number of documents matched) of every individual pattern.
+The report is written to `policy_scores_profile.json` next to the
+CSV; patterns that never matched are listed under
+``unmatched_patterns``.  Times of worker processes are summed, so
+with ``--jobs`` they can exceed the ``total`` wall time.  Only
+policies that are actually classified are profiled, so combine it
+with ``--no-cache`` to profile the whole corpus.  Without
+``--profile`` the instrumentation costs nothing measurable.
 
 """
 
+import argparse
+import concurrent.futures
 import csv
+import hashlib
+import inspect
+import json
 import os
 import re
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from text_normalisation import (
+    NORMALISATION_KEY,
+    Normalised,
+    cached_normalise,
+    fold,
+    lower_text,
+    normalise_chunks,
+    normalise_text,
+)
+
+# pyarrow is an optional dependency that only --columnar needs; it is
+# imported by require_pyarrow() so that importing this module stays fast.
+pa = pc = pq = None
 
 
 ###############################################################################
@@ -68,6 +205,52 @@ OUTPUT_CSV = (
     / "policy_scores.csv"
 )
 
+# On‑disk cache of raw condition values per policy text (see
+# ScoreCache).  It lives next to the output tables but is not itself
+# an output and is ignored by git.
+CACHE_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "analysis"
+    / "outputs"
+    / ".cache"
+    / "policy_scores_cache.json"
+)
+
+# Normalised texts and their segmentation (see Document), one file per
+# text digest.  Entries are dropped together with the ScoreCache
+# entries of their text.
+NORMALISED_DIR = CACHE_PATH.with_name("normalised")
+SEGMENTS_DIR = CACHE_PATH.with_name("segments")
+
+# File suffix of each --columnar format.  The columnar table is
+# written next to OUTPUT_CSV with the same stem.
+COLUMNAR_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Evidence snippets written by --snippets: one directory per policy
+# ID, following snippets/GUIDE.md.
+SNIPPETS_DIR = Path(__file__).resolve().parents[2] / "snippets" / "by_policy"
+
+# Partial tables written by --shard, one CSV/TSV pair per shard;
+# merge_score_shards.py combines them into OUTPUT_CSV.
+SHARDS_DIR = OUTPUT_CSV.with_name("shards")
+
+# Report written by --profile, next to the output tables.
+PROFILE_JSON = OUTPUT_CSV.with_name("policy_scores_profile.json")
+
+# Default maximum number of policies kept in the cache.
+DEFAULT_CACHE_SIZE = 10000
+
+# Default number of policies read ahead by background threads while
+# earlier ones are classified (--prefetch).
+DEFAULT_PREFETCH = 8
+
+# In streaming mode (--chunk-size) each chunk is scanned together with
+# this many preceding characters.  Every rule match up to this length
+# is found even if it crosses a chunk boundary; the bounded rules are
+# all far shorter, and only the ".*" rules could in principle span
+# more of a single line.
+STREAM_OVERLAP = 65536
+
 # Weights for the initial MELIBEA formula (sum to 1.0).  The keys
 # correspond to conditions C1–C8.  See Vincent‑Lamarre et al. (2015)
 # for details.
@@ -115,11 +298,1208 @@ CONDITION_BOUNDS: Dict[str, Tuple[float, float]] = {
 }
 
 
+###############################################################################
+# Detection rules
+###############################################################################
+
+class Near(NamedTuple):
+    """Proximity rule: `first` followed by `second` within `within` tokens.
+
+    Both terms are regular expressions matched against the lower‑cased
+    text.  The distance is the number of word tokens from the start of
+    a `first` match to the start of a later `second` match (1 for
+    adjacent words).  With ``ordered=False`` either term may come
+    first.  Unlike a ``first.*second`` pattern, a proximity rule is
+    evaluated by a positional scan that is linear in the length of the
+    text, so it cannot backtrack on long single‑line paragraphs.
+    """
+
+    first: str
+    second: str
+    within: int
+    ordered: bool = True
+
+
+class SameSentence(NamedTuple):
+    """Sentence rule: `first` followed by `second` in the same sentence.
+
+    Sentences are delimited by ``SENTENCE_BREAK`` (see `Document`), and
+    a match belongs to the sentence it starts in.  With
+    ``ordered=False`` either term may come first.  The rule is
+    evaluated like a Near rule, by a positional scan over the sentence
+    starts of the document.
+    """
+
+    first: str
+    second: str
+    ordered: bool = True
+
+
+# A rule is a regular expression, a proximity rule or a sentence rule.
+Rule = Union[str, Near, SameSentence]
+
+# Keyword and regular expression rules for each condition, split into
+# per‑language packs.  Within a pack, rules are grouped per condition
+# into named pattern lists; a group counts as found when any of its
+# patterns in any applied pack matches the lower‑cased policy text.
+# The "any" pack holds language‑neutral terms (acronyms and loanwords)
+# and is applied to every policy; the other packs are only applied to
+# policies in their language (see `rule_languages`), so the regex work
+# per policy does not grow as packs for further languages are added.
+# The classifiers below only look at which groups were found, so the
+# patterns themselves can be refined here without touching the
+# decision logic.  All patterns are matched case‑insensitively by
+# lower‑casing the text once before scanning.  Alternatives are listed
+# as separate entries rather than joined with "|" so that the scanner
+# can anchor each of them on its literal prefix.  "Term A near term B"
+# rules use Near rather than an unbounded "A.*B" pattern, and
+# SameSentence when both terms must occur in one sentence.
+RULE_PACKS: Dict[str, Dict[str, Dict[str, List[Rule]]]] = {
+    "any": {
+        "C3": {
+            "author_version": [r"aam"],
+            "publisher_version": [r"vor"],
+            # Unrefereed preprint (if explicitly mentioned)
+            "preprint": [r"preprint"],
+        },
+        "C5": {
+            "embargo_context": [r"embargo"],
+            # Generic statements deferring to publisher or unspecified period
+            "publisher_period": [r"embargo"],
+        },
+        "C7": {
+            "patterns": [r"tenure"],  # also "Tenure-Track" in German
+        },
+        "C8": {
+            "patterns": [r"dissertation"],
+        },
+    },
+    "en": {
+        "C1": {
+            # Strong mandate words
+            "strong_patterns": [
+                r"\bmust\b",
+                r"\bshall\b",
+                r"\bar[e]? required\b",
+                r"\brequirement\b",
+            ],
+            # Weaker request words
+            "weak_patterns": [
+                r"\bshould\b",
+                r"\bare encouraged\b",
+                r"\bencourage\b",
+                r"\brecommend\b",
+            ],
+        },
+        "C2": {
+            # Patterns indicating that authors may choose not to deposit
+            "deposit_optout_patterns": [
+                Near(r"deposit", r"\b(opt\-?out|waive)\b", within=20),
+                r"\bopt\-?out of deposit\b",
+            ],
+            # Patterns indicating an opt‑out for open access but not deposit
+            "oa_optout_patterns": [
+                Near(r"open access", r"\bopt\-?out\b", within=20),
+                r"\bopt\-?out of open access\b",
+                Near(r"\bembargo", r"upon request\b", within=20),
+            ],
+            # Patterns indicating no opt‑out (mandatory deposit & OA)
+            "no_optout_patterns": [
+                r"\bno opt\-?out\b",
+                r"\bwithout exception\b",
+            ],
+        },
+        "C3": {
+            "author_version": [
+                r"author[^\n]{0,30}version",
+                r"accepted manuscript",
+            ],
+            "publisher_version": [
+                r"publisher[^\n]{0,30}version",
+                r"version of record",
+            ],
+        },
+        "C4": {
+            "acceptance": [
+                r"time of acceptance",
+                r"upon of acceptance",
+            ],
+            "publication": [
+                r"at publication",
+                r"upon publication",
+            ],
+            "asap": [
+                r"as soon as possible",
+                r"promptly",
+            ],
+        },
+        "C5": {
+            # 6 months embargo (only counts together with "embargo_context")
+            "six_months": [
+                r"six\\s+months?",
+                r"6\\s+months?",
+            ],
+            "embargo_context": [r"after publication"],
+            # 12 months or more
+            "twelve_months": [
+                r"twelve\\s+months?",
+                r"12\\s+months?",
+                r"one year",
+            ],
+            "publisher_period": [r"period stipulated by the publisher"],
+        },
+        "C6": {
+            # Strong rights retention
+            "strong_patterns": [
+                r"retain[\\s\\w]{0,20}non\\-exclusive rights",
+                r"grant[\\s\\w]{0,20}non\\-exclusive licence",
+                r"license[^\\n]{0,40}right[s]? to publisher",
+                r"copyright will be retained",
+                r"blanket copyright reservation",
+            ],
+            # Weaker rights retention / opt‑out possible
+            "medium_patterns": [
+                r"may opt out of rights reservation",
+                r"case\\-by\\-case basis",
+                r"authors should retain copyright",
+                r"authors should retain rights whenever possible",
+                r"any agreements must comply",
+            ],
+            # Explicitly no rights reservation
+            "negative_patterns": [
+                r"no copyright reservation",
+                r"copyright is transferred",
+                r"copyright assignment",
+            ],
+        },
+        "C7": {
+            "patterns": [
+                r"performance review",
+                r"performance evaluation",
+                r"promotion",  # not German "Promotion" (doctorate)
+                r"internal use",
+            ],
+        },
+        "C8": {
+            "patterns": [
+                r"thesis",
+                r"theses",
+            ],
+        },
+    },
+    "de": {
+        "C1": {
+            "strong_patterns": [
+                r"\bverpflichtet\b",  # obligated
+                r"\bpflicht\b",       # duty/obligation
+                r"\bmüssen\b",         # must
+            ],
+            "weak_patterns": [
+                r"\bsollten\b",    # should
+                r"\bempfehl[ea]n\b",  # recommend
+                r"\bsoll\b",      # shall/should (context ambiguous)
+            ],
+        },
+        "C2": {
+            "deposit_optout_patterns": [
+                r"\bverzicht auf hinterlegung\b",  # opt out of deposit
+            ],
+            "oa_optout_patterns": [
+                r"\bverzicht auf open access\b",
+            ],
+            "no_optout_patterns": [
+                r"\bkeine ausnahme\b",  # no exception
+            ],
+        },
+        "C3": {
+            "author_version": [r"autorenfassung"],
+        },
+        "C4": {
+            "acceptance": [
+                r"bei annahme",
+                r"nach annahme",
+            ],
+            "publication": [
+                r"bei veröffentlichung",
+                r"nach veröffentlichung",
+            ],
+            "asap": [r"so bald wie möglich"],
+        },
+        "C5": {
+            "embargo_context": [r"nach veröffentlichung"],
+            "twelve_months": [
+                r"mehr als 12 monate",
+                r"ein jahr",
+            ],
+            "publisher_period": [r"verlag"],
+        },
+        "C6": {
+            "strong_patterns": [
+                r"autoren behalten das recht",  # authors retain the right
+            ],
+            "medium_patterns": [
+                r"rechte sollten behalten",  # rights should be retained
+            ],
+            "negative_patterns": [
+                # Copyright transferred.  Kept tight so that advice to
+                # retain copyright and transfer only simple usage rights
+                # ("Urheberrechte wahrzunehmen ... Nutzungsrechte zu
+                # übertragen") is not read as a transfer.
+                Near(r"urheberrecht", r"übertragen", within=8),
+            ],
+        },
+        "C7": {
+            "patterns": [
+                r"leistungsbewertung",    # performance evaluation
+                r"evaluationszwecke",     # evaluation purposes
+            ],
+        },
+        "C8": {
+            "patterns": [
+                r"doktorarbeit",
+                r"abschlussarbeit",
+            ],
+        },
+    },
+}
+
+# Pack applied to every policy regardless of its language.
+NEUTRAL_PACK = "any"
+
+# Order in which the groups of each condition appear in RULES (and so
+# in the scanner, the profile and the evidence).
+RULE_GROUPS: Dict[str, List[str]] = {
+    "C1": ["strong_patterns", "weak_patterns"],
+    "C2": ["deposit_optout_patterns", "oa_optout_patterns", "no_optout_patterns"],
+    "C3": ["author_version", "publisher_version", "preprint"],
+    "C4": ["acceptance", "publication", "asap"],
+    "C5": ["six_months", "embargo_context", "twelve_months", "publisher_period"],
+    "C6": ["strong_patterns", "medium_patterns", "negative_patterns"],
+    "C7": ["patterns"],
+    "C8": ["patterns"],
+}
+
+
+def merge_rule_packs(
+    packs: Dict[str, Dict[str, Dict[str, List[Rule]]]]
+) -> Tuple[Dict[str, Dict[str, List[Rule]]], List[str]]:
+    """Merge rule packs into one rule table.
+
+    Returns the table (conditions and groups in RULE_GROUPS order, the
+    patterns of each group pack by pack) and the pack of every pattern,
+    in the order in which `RuleScanner` enumerates them.
+    """
+    for language, pack in packs.items():
+        for cond, groups in pack.items():
+            unknown = set(groups) - set(RULE_GROUPS[cond])
+            if unknown:
+                raise ValueError(f"Unknown rule groups in pack {language!r}: {unknown}")
+    rules: Dict[str, Dict[str, List[Rule]]] = {}
+    languages: List[str] = []
+    for cond, group_names in RULE_GROUPS.items():
+        rules[cond] = {}
+        for group in group_names:
+            patterns = rules[cond][group] = []
+            for language, pack in packs.items():
+                for pattern in pack.get(cond, {}).get(group, []):
+                    patterns.append(pattern)
+                    languages.append(language)
+    return rules, languages
+
+
+# All packs merged, and the pack of each pattern of the merged table.
+RULES, PATTERN_LANGUAGES = merge_rule_packs(RULE_PACKS)
+
+# Words that are frequent in running text of each language with a
+# rule pack.  They are counted in the start of a policy to detect
+# its language(s).
+LANGUAGE_MARKERS: Dict[str, FrozenSet[str]] = {
+    "en": frozenset(
+        "the and of to is that for are with be this by".split()
+    ),
+    "de": frozenset(
+        "der die und das ist nicht mit für von zu den des im sind".split()
+    ),
+}
+
+# Number of characters at the start of a policy used for detection.
+LANGUAGE_SAMPLE = 20000
+
+# A language counts as present if it has at least this many marker
+# words and at least this share of the markers of the most frequent
+# language, so bilingual policies get both packs.
+LANGUAGE_MIN_MARKERS = 5
+LANGUAGE_MIN_SHARE = 0.2
+
+WORD = re.compile(r"\w+")
+
+# Codebook code (methods/codebook.md) assigned to evidence snippets of
+# each rule group.
+SNIPPET_CODES: Dict[str, str] = {
+    "C1.strong_patterns": "deposit.binding",
+    "C1.weak_patterns": "deposit.encouraged",
+    "C2.deposit_optout_patterns": "optout.deposit",
+    "C2.oa_optout_patterns": "optout.access",
+    "C2.no_optout_patterns": "optout.none",
+    "C3.author_version": "version.accepted",
+    "C3.publisher_version": "version.published",
+    "C3.preprint": "version.preprint",
+    "C4.acceptance": "deposit.window",
+    "C4.publication": "deposit.window",
+    "C4.asap": "deposit.window",
+    "C5.six_months": "deposit.window",
+    "C5.embargo_context": "deposit.window",
+    "C5.twelve_months": "deposit.window",
+    "C5.publisher_period": "deposit.window",
+    "C6.strong_patterns": "rights.retention",
+    "C6.medium_patterns": "rights.retention",
+    "C6.negative_patterns": "rights.transfer",
+    "C7.patterns": "compliance.monitoring",
+    "C8.patterns": "scope.theses",
+}
+
+
+###############################################################################
+# Profiling
+###############################################################################
+
+class Profiler:
+    """Accumulate wall time and counts for the ``--profile`` report.
+
+    ``patterns`` maps a scanner pattern index to [seconds, calls,
+    hits], where calls counts the documents the pattern was evaluated
+    on and hits those it matched.  ``classifiers`` and ``stages`` map
+    a condition or stage name to [seconds, calls].  Worker processes
+    hand their counters to the parent with `drain`, which `merge`s
+    them.
+    """
+
+    def __init__(self) -> None:
+        self.patterns: Dict[int, List[float]] = {}
+        self.classifiers: Dict[str, List[float]] = {}
+        self.stages: Dict[str, List[float]] = {}
+
+    def add(self, table: Dict, key, seconds: float, calls: int = 1) -> None:
+        """Add `seconds` and `calls` to the counters of `key` in `table`."""
+        stats = table.setdefault(key, [0.0, 0])
+        stats[0] += seconds
+        stats[1] += calls
+
+    def count_pattern(self, index: int, seconds: float, hit: bool) -> None:
+        """Record one document scanned for pattern `index`."""
+        stats = self.patterns.setdefault(index, [0.0, 0, 0])
+        stats[0] += seconds
+        stats[1] += 1
+        stats[2] += hit
+
+    def drain(self) -> dict:
+        """Return the counters as plain data and reset them."""
+        data = {
+            "patterns": self.patterns,
+            "classifiers": self.classifiers,
+            "stages": self.stages,
+        }
+        self.patterns, self.classifiers, self.stages = {}, {}, {}
+        return data
+
+    def merge(self, data: dict) -> None:
+        """Add counters returned by another process's `drain`."""
+        for table in ("patterns", "classifiers", "stages"):
+            mine = getattr(self, table)
+            for key, stats in data[table].items():
+                if key in mine:
+                    mine[key] = [a + b for a, b in zip(mine[key], stats)]
+                else:
+                    mine[key] = list(stats)
+
+    def report(self, scanner: "RuleScanner") -> dict:
+        """Return the JSON report for patterns of `scanner`."""
+        patterns = []
+        for index, pattern in enumerate(scanner.patterns):
+            seconds, calls, hits = self.patterns.get(index, [0.0, 0, 0])
+            patterns.append(
+                {
+                    "group": scanner.groups[index],
+                    "pattern": pattern if isinstance(pattern, str) else repr(pattern),
+                    "seconds": round(seconds, 6),
+                    "calls": calls,
+                    "hits": hits,
+                }
+            )
+        return {
+            "stages": _timing_table(self.stages),
+            "classifiers": _timing_table(self.classifiers),
+            "patterns": patterns,
+            # Patterns evaluated on at least one document without ever
+            # matching: candidates for dead rules.
+            "unmatched_patterns": [
+                p["group"] + ": " + p["pattern"]
+                for p in patterns
+                if p["calls"] and not p["hits"]
+            ],
+        }
+
+
+def _timing_table(table: Dict[str, List[float]]) -> Dict[str, dict]:
+    return {
+        key: {"seconds": round(seconds, 6), "calls": calls}
+        for key, (seconds, calls) in table.items()
+    }
+
+
+# Active profiler, or None (the default) when --profile is off.  Hot
+# paths read this once per document or window, so profiling costs
+# nothing measurable when it is disabled.
+PROFILER: Optional[Profiler] = None
+
+
+###############################################################################
+# Documents
+###############################################################################
+
+# Word tokens, used to measure distances in proximity rules.
+TOKEN_RE = re.compile(r"\w+")
+
+# Ends of sentences (or paragraphs and pages).  They delimit the
+# sentences of SameSentence rules and the quotes of evidence.
+SENTENCE_BREAK = re.compile(r"[.!?](?=\s)|\n[ \t]*\n|\f")
+
+# Ends of paragraphs (blank lines) and pages.
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n|\f")
+
+# Stored in every segment file; files written with other segmentation
+# expressions or lower‑casing are recomputed.
+SEGMENTS_KEY = int(
+    hashlib.sha256(
+        "\n".join(
+            [str(NORMALISATION_KEY), inspect.getsource(lower_text)]
+            + [regex.pattern for regex in (TOKEN_RE, SENTENCE_BREAK, PARAGRAPH_BREAK)]
+        ).encode("utf-8")
+    ).hexdigest()[:15],
+    16,
+)
+
+Segments = Tuple[array, array, array]
+
+
+class Document:
+    """A policy text, prepared once for scanning and classification.
+
+    ``text`` is the text as read.  ``normalised`` is the Normalised
+    form of it (see text_normalisation.py) and ``lower`` its normalised
+    text lower‑cased, which every rule is matched against.  ``tokens``,
+    ``sentences`` and ``paragraphs`` hold the start offsets in
+    ``lower`` of its word tokens, sentences and paragraphs as
+    ``array('q')``.  They are computed together on first use, so a text
+    that no proximity or sentence rule needs is never segmented.  With
+    `cached`, the normalised text and the segmentation are read from,
+    or else written to, files named after the text digest in
+    NORMALISED_DIR and SEGMENTS_DIR.  ``hits`` holds the rule groups
+    the scanner found, which is all the classifiers read.
+
+    In streaming mode (``--chunk-size``) the text is never held whole,
+    and a policy's Document only carries its hits (``text`` is None).
+    """
+
+    __slots__ = ("text", "normalised", "lower", "hits", "_digest", "_segments")
+
+    def __init__(
+        self,
+        text: Optional[str],
+        cached: bool = False,
+        hits: FrozenSet[str] = frozenset(),
+    ) -> None:
+        self.text = text
+        self.hits = hits
+        self._digest = None if text is None or not cached else text_digest(text)
+        self._segments: Optional[Segments] = None
+        self.normalised: Optional[Normalised] = None
+        self.lower: Optional[str] = None
+        if text is not None:
+            begin = time.perf_counter()
+            if self._digest is None:
+                self.normalised = normalise_text(text)
+            else:
+                self.normalised = cached_normalise(text, self._digest, NORMALISED_DIR)
+            self.lower = lower_text(self.normalised.text)
+            if PROFILER is not None:
+                PROFILER.add(PROFILER.stages, "normalise", time.perf_counter() - begin)
+
+    @property
+    def tokens(self) -> array:
+        return self._segment()[0]
+
+    @property
+    def sentences(self) -> array:
+        return self._segment()[1]
+
+    @property
+    def paragraphs(self) -> array:
+        return self._segment()[2]
+
+    def sentence_at(self, offset: int) -> int:
+        """Return the index of the sentence that character `offset` falls in."""
+        return bisect_right(self.sentences, offset) - 1
+
+    def paragraph_at(self, offset: int) -> int:
+        """Return the index of the paragraph that character `offset` falls in."""
+        return bisect_right(self.paragraphs, offset) - 1
+
+    def _segment(self) -> Segments:
+        if self._segments is None:
+            if self.lower is None:
+                raise ValueError("a streamed Document has no text to segment")
+            begin = time.perf_counter()
+            path = None
+            if self._digest is not None:
+                path = SEGMENTS_DIR / f"{self._digest}.seg"
+                self._segments = load_segments(path)
+            if self._segments is None:
+                self._segments = segment(self.lower)
+                if path is not None:
+                    save_segments(path, self._segments)
+            if PROFILER is not None:
+                PROFILER.add(PROFILER.stages, "segment", time.perf_counter() - begin)
+        return self._segments
+
+
+def segment(text: str) -> Segments:
+    """Return the token, sentence and paragraph start offsets of `text`."""
+    tokens = array("q", [m.start() for m in TOKEN_RE.finditer(text)])
+    sentences = array("q", [0])
+    sentences.extend(m.end() for m in SENTENCE_BREAK.finditer(text))
+    paragraphs = array("q", [0])
+    paragraphs.extend(m.end() for m in PARAGRAPH_BREAK.finditer(text))
+    return tokens, sentences, paragraphs
+
+
+def load_segments(path: Path) -> Optional[Segments]:
+    """Read a file written by `save_segments`; None if it is missing or stale."""
+    try:
+        with path.open("rb") as f:
+            header = array("q")
+            header.fromfile(f, 4)
+            if header[0] != SEGMENTS_KEY:
+                return None
+            segments = []
+            for count in header[1:]:
+                offsets = array("q")
+                offsets.fromfile(f, count)
+                segments.append(offsets)
+    except (OSError, EOFError, ValueError):
+        return None
+    return tuple(segments)
+
+
+def save_segments(path: Path, segments: Segments) -> None:
+    """Write the segmentation of a text atomically.
+
+    The file holds SEGMENTS_KEY, the length of each array and then the
+    arrays, all as native 64‑bit integers.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Pool workers may segment identical texts at the same time.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        array("q", [SEGMENTS_KEY, *map(len, segments)]).tofile(f)
+        for offsets in segments:
+            offsets.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def prune_artefacts(
+    keep: Iterable[str], directories: Iterable[Path] = (NORMALISED_DIR, SEGMENTS_DIR)
+) -> None:
+    """Delete the normalised texts and segment files of texts whose digest is not in `keep`."""
+    keep = set(keep)
+    for directory in directories:
+        if not directory.is_dir():
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.split(".")[0] not in keep:
+                    os.remove(entry.path)
+
+
+###############################################################################
+# Scanning engine
+###############################################################################
+
+# Characters that end the literal prefix of a pattern.
+_REGEX_SPECIAL = set("[](){}.*+?|^$\\")
+
+
+def literal_prefix(pattern: str) -> str:
+    """Return the literal text every match of `pattern` must start with.
+
+    Only a leading ``\\b`` (which consumes nothing) is skipped; the
+    prefix ends at the first regex metacharacter.  If that
+    metacharacter is a quantifier, the character it applies to is
+    dropped.  Patterns with a top‑level alternation have no common
+    prefix and yield an empty string.
+    """
+    depth = 0
+    escaped = in_class = False
+    for ch in pattern:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return ""
+    body = pattern[2:] if pattern.startswith(r"\b") else pattern
+    prefix: List[str] = []
+    i = 0
+    while i < len(body):
+        if body.startswith(r"\-", i):
+            prefix.append("-")
+            i += 2
+            continue
+        if body[i] in _REGEX_SPECIAL:
+            if body[i] in "?*{":
+                prefix = prefix[:-1]
+            break
+        prefix.append(body[i])
+        i += 1
+    return "".join(prefix)
+
+
+class ProximityMatcher:
+    """Compiled form of a Near or SameSentence rule.
+
+    Both terms are located with one ``finditer`` pass each.  The
+    matches come out in text order, so a single merge pass over the
+    two lists decides whether any pair lies within the allowed
+    distance: the number of word tokens for a Near rule, no sentence
+    break for a SameSentence rule.  The token or sentence of each
+    candidate is looked up by bisection in the offsets of the policy's
+    Document or, without one (in streaming mode), in those found by one
+    walk over the text between the first and last candidate.  The
+    total work is linear in the length of the text however many
+    candidates there are.
+    """
+
+    def __init__(self, rule: Union[Near, SameSentence]) -> None:
+        self.rule = rule
+        self._first = re.compile(rule.first)
+        self._second = re.compile(rule.second)
+        self._first_prefix = literal_prefix(rule.first)
+        self._second_prefix = literal_prefix(rule.second)
+        self._by_sentence = isinstance(rule, SameSentence)
+        self._within = 0 if self._by_sentence else rule.within
+
+    def search(
+        self,
+        text: str,
+        start: int = 0,
+        limit: Optional[int] = None,
+        document: Optional[Document] = None,
+    ) -> bool:
+        """Return True if the rule matches lower‑cased `text`.
+
+        `start` and `limit` restrict the span covered by a match as in
+        `RuleScanner.match_pattern`.  `document`, if given, is the
+        Document whose ``lower`` is `text`.
+        """
+        return next(self.finditer(text, start, limit, document), None) is not None
+
+    def finditer(
+        self,
+        text: str,
+        start: int = 0,
+        limit: Optional[int] = None,
+        document: Optional[Document] = None,
+    ) -> Iterator[Tuple[int, int]]:
+        """Yield the span of every pair of terms within range.
+
+        A span runs from the start of the nearest preceding first term
+        to the end of the second term (or the other way round for
+        unordered rules).
+        """
+        if self._first_prefix not in text or self._second_prefix not in text:
+            return
+        firsts = [(m.start(), m.end()) for m in self._first.finditer(text, start)]
+        seconds = [
+            (m.start(), m.end())
+            for m in self._second.finditer(text, start)
+            if limit is None or m.end() < limit
+        ]
+        if not firsts or not seconds:
+            return
+        yield from self._ordered_pairs(text, firsts, seconds, document)
+        if not self.rule.ordered:
+            yield from self._ordered_pairs(text, seconds, firsts, document)
+
+    def _ordered_pairs(
+        self,
+        text: str,
+        leading: List[Tuple[int, int]],
+        trailing: List[Tuple[int, int]],
+        document: Optional[Document],
+    ) -> Iterator[Tuple[int, int]]:
+        """Yield spans where a `trailing` match starts within range after a `leading` one."""
+        lo = leading[0][0]
+        hi = trailing[-1][0] + 1
+        if hi <= lo:
+            return
+        # Start offsets of the units counted.  Offsets before the first
+        # one get position -1; positions are only compared with each
+        # other, so they need not be counted from the start of the text.
+        if document is not None:
+            bounds = document.sentences if self._by_sentence else document.tokens
+        elif self._by_sentence:
+            bounds = [m.end() for m in SENTENCE_BREAK.finditer(text, lo, hi)]
+        else:
+            bounds = [m.start() for m in TOKEN_RE.finditer(text, lo, hi)]
+        leading_positions = [bisect_right(bounds, s) - 1 for s, _ in leading]
+        trailing_positions = [bisect_right(bounds, s) - 1 for s, _ in trailing]
+        i = 0
+        latest = None  # position of the last leading match ending so far
+        latest_start = 0
+        for (t_start, t_end), t_position in zip(trailing, trailing_positions):
+            while i < len(leading) and leading[i][1] <= t_start:
+                latest = leading_positions[i]
+                latest_start = leading[i][0]
+                i += 1
+            if latest is not None and t_position - latest <= self._within:
+                yield latest_start, t_end
+
+
+class RuleScanner:
+    """Find every rule group in RULES that occurs in a policy text.
+
+    The scanner is compiled once, on first use (see `compile`): each
+    pattern is compiled and paired with its literal prefix (see `literal_prefix`); Near and
+    SameSentence rules are compiled into a ProximityMatcher.  Rules are
+    matched against the normalised text (see text_normalisation.py)
+    and their umlauts are folded accordingly.  Scanning a policy
+    lower‑cases the text once and then, for each pattern, jumps with
+    ``str.find`` to the occurrences of its prefix and only tries the
+    compiled regex at those positions.  Most patterns in RULES start
+    with a word boundary, which stops Python's regex engine from
+    using its own fast literal search, so anchoring them this way
+    avoids testing the pattern at every character of the document.
+    Patterns of a group are skipped once the group has been found.
+    """
+
+    def __init__(self, rules: Dict[str, Dict[str, List[Rule]]]) -> None:
+        self.patterns: List[Rule] = []
+        self.groups: List[str] = []
+        self.conditions: List[str] = []
+        for cond, groups in rules.items():
+            for group, patterns in groups.items():
+                for pattern in patterns:
+                    self.patterns.append(pattern)
+                    self.groups.append(f"{cond}.{group}")
+                    self.conditions.append(cond)
+        self._compiled: Optional[List[Union[Pattern[str], ProximityMatcher]]] = None
+        self._prefixes: List[str] = []
+
+    def compile(self) -> None:
+        """Compile the patterns; done once, on first use, if not called before."""
+        if self._compiled is not None:
+            return
+        # Texts are scanned in normalised form, so umlauts in the rules
+        # are folded the same way.
+        self._prefixes = [
+            literal_prefix(fold(p)) if isinstance(p, str) else "" for p in self.patterns
+        ]
+        self._compiled = [
+            re.compile(fold(p))
+            if isinstance(p, str)
+            else ProximityMatcher(p._replace(first=fold(p.first), second=fold(p.second)))
+            for p in self.patterns
+        ]
+
+    def match_pattern(
+        self,
+        index: int,
+        text: str,
+        start: int = 0,
+        limit: Optional[int] = None,
+        document: Optional[Document] = None,
+    ) -> bool:
+        """Return True if pattern `index` occurs in lower‑cased `text`.
+
+        Only matches starting at or after `start` and, if `limit` is
+        given, ending before `limit` are counted.  `document`, if
+        given, is the Document whose ``lower`` is `text`; proximity and
+        sentence rules then use its segmentation.
+        """
+        return (
+            next(self.iter_matches(index, text, start, limit, document), None)
+            is not None
+        )
+
+    def iter_matches(
+        self,
+        index: int,
+        text: str,
+        start: int = 0,
+        limit: Optional[int] = None,
+        document: Optional[Document] = None,
+    ) -> Iterator[Tuple[int, int]]:
+        """Yield the spans of the non‑overlapping matches of pattern `index`.
+
+        `start`, `limit` and `document` are as in `match_pattern`.
+        """
+        if self._compiled is None:
+            self.compile()
+        regex = self._compiled[index]
+        if isinstance(regex, ProximityMatcher):
+            yield from regex.finditer(text, start, limit, document)
+            return
+        prefix = self._prefixes[index]
+        pos = start
+        while True:
+            if prefix:
+                pos = text.find(prefix, pos)
+                if pos == -1:
+                    return
+                m = regex.match(text, pos)
+            else:
+                m = regex.search(text, pos)
+                if m is None:
+                    return
+                pos = m.start()
+            if m is not None and (limit is None or m.end() < limit):
+                yield m.span()
+                pos = max(m.end(), pos + 1)
+            else:
+                pos += 1
+
+    def scan(
+        self,
+        text: str,
+        conditions: Optional[Iterable[str]] = None,
+        evidence: Optional[List["Evidence"]] = None,
+        skip: FrozenSet[int] = frozenset(),
+    ) -> FrozenSet[str]:
+        """Normalise and lower‑case `text` once and return the names of all rule groups found.
+
+        Group names have the form ``"<condition>.<group>"``, e.g.
+        ``"C1.strong_patterns"``.  If `conditions` is given, only the
+        rules of those conditions are scanned.  If an `evidence` list
+        is given, every match of every pattern is appended to it.
+        Patterns whose index is in `skip` (known not to occur, see
+        policy_index.py) are not evaluated.
+        """
+        return self.scan_chunks(
+            [normalise_text(text)], conditions, evidence=evidence, skip=skip
+        )
+
+    def scan_document(
+        self,
+        document: Document,
+        conditions: Optional[Iterable[str]] = None,
+        evidence: Optional[List["Evidence"]] = None,
+        skip: FrozenSet[int] = frozenset(),
+    ) -> FrozenSet[str]:
+        """Like `scan`, but reuse the normalised text and segmentation of `document`."""
+        return self.scan_chunks(
+            [document.normalised], conditions, evidence=evidence, skip=skip, document=document
+        )
+
+    def scan_chunks(
+        self,
+        chunks: Iterable[Normalised],
+        conditions: Optional[Iterable[str]] = None,
+        overlap: int = 0,
+        evidence: Optional[List["Evidence"]] = None,
+        skip: FrozenSet[int] = frozenset(),
+        document: Optional[Document] = None,
+    ) -> FrozenSet[str]:
+        """Return the rule groups found in a text supplied as successive chunks.
+
+        The chunks are the normalised pieces of the text (see
+        `normalise_chunks`).  Each chunk is scanned together with the last `overlap`
+        characters of the text before it, so any match of at most
+        `overlap` characters that straddles a chunk boundary is still
+        found.  One extra character of context is kept on either side
+        of a window and matches touching a window edge are ignored,
+        so a word cut at a chunk boundary never satisfies ``\\b``
+        (a match ignored at the right edge is found again in the next
+        window).  Only two chunks are held in memory at a time.
+
+        While profiling or collecting evidence, every pattern is
+        evaluated (not only until its group is found) so that hit
+        counts and evidence are complete.  Evidence offsets and pages
+        refer to the whole original text, and a match in the overlap of
+        two windows is only recorded once, from the window that holds
+        its whole sentence.  Its quote and match are still normalised
+        text (see `restore_quotes`).
+
+        `document` is the Document of a text passed as a single chunk
+        (see `scan_document`).
+        """
+        wanted = None if conditions is None else set(conditions)
+        found: Set[str] = set()
+        profiler = PROFILER
+        exhaustive = profiler is not None or evidence is not None
+        if profiler is not None:
+            pattern_seconds: Dict[int, float] = {}
+            matched: Set[int] = set()
+        recorded: Set[Tuple[int, int, int]] = set()
+        offset = 0          # position of the current window in the normalised text
+        form_feeds = 0      # page breaks before the current window
+        tail = ""
+        tail_offsets: Sequence[int] = array("q")
+        chunk_iter = iter(chunks)
+        chunk = next(chunk_iter, None)
+        while chunk is not None:
+            next_chunk = next(chunk_iter, None)
+            window = tail + chunk.text
+            if evidence is not None:
+                offsets = tail_offsets + chunk.offsets if tail else chunk.offsets
+            t = lower_text(window) if document is None else document.lower
+            start = 1 if tail else 0
+            limit = None if next_chunk is None else len(t)
+            for index, group in enumerate(self.groups):
+                if wanted is not None and self.conditions[index] not in wanted:
+                    continue
+                if index in skip:
+                    continue
+                if not exhaustive:
+                    if group not in found and self.match_pattern(
+                        index, t, start, limit, document
+                    ):
+                        found.add(group)
+                    continue
+                begin = time.perf_counter()
+                if evidence is None:
+                    hit = self.match_pattern(index, t, start, limit, document)
+                else:
+                    hit = False
+                    for m_start, m_end in self.iter_matches(
+                        index, t, start, limit, document
+                    ):
+                        hit = True
+                        # Leave matches whose sentence may run past the
+                        # window to the next window, which rescans them.
+                        if (
+                            limit is not None
+                            and m_end + MAX_QUOTE_CONTEXT > limit
+                            and m_start >= limit - overlap
+                        ):
+                            continue
+                        key = (index, offset + m_start, offset + m_end)
+                        if key not in recorded:
+                            recorded.add(key)
+                            evidence.append(
+                                make_evidence(
+                                    window,
+                                    offsets,
+                                    form_feeds,
+                                    group,
+                                    index,
+                                    m_start,
+                                    m_end,
+                                )
+                            )
+                if profiler is not None:
+                    pattern_seconds[index] = (
+                        pattern_seconds.get(index, 0.0) + time.perf_counter() - begin
+                    )
+                    if hit:
+                        matched.add(index)
+                if hit:
+                    found.add(group)
+            tail = window[-(overlap + 1):]
+            if evidence is not None:
+                tail_offsets = offsets[len(offsets) - len(tail):]
+                offset += len(window) - len(tail)
+                form_feeds += window.count("\f") - tail.count("\f")
+            chunk = next_chunk
+        if profiler is not None:
+            for index, seconds in pattern_seconds.items():
+                profiler.count_pattern(index, seconds, index in matched)
+        return frozenset(found)
+
+
+# Shared by every call to analyse_policy; its patterns are compiled on
+# first use.
+SCANNER = RuleScanner(RULES)
+
+# Every language with a rule pack of its own.
+ALL_LANGUAGES: Tuple[str, ...] = tuple(sorted(set(RULE_PACKS) - {NEUTRAL_PACK}))
+
+
+def detect_languages(sample: str) -> List[str]:
+    """Return the languages with a rule pack that `sample` is written in.
+
+    Counts the LANGUAGE_MARKERS of each language among the words of
+    `sample`; see LANGUAGE_MIN_MARKERS and LANGUAGE_MIN_SHARE.
+    """
+    counts = dict.fromkeys(LANGUAGE_MARKERS, 0)
+    for word in WORD.findall(sample.lower()):
+        for language, markers in LANGUAGE_MARKERS.items():
+            if word in markers:
+                counts[language] += 1
+    top = max(counts.values(), default=0)
+    return [
+        language
+        for language, count in counts.items()
+        if count >= LANGUAGE_MIN_MARKERS and count >= LANGUAGE_MIN_SHARE * top
+    ]
+
+
+def rule_languages(sample: str, declared: Iterable[str]) -> Tuple[str, ...]:
+    """Return the languages whose rule packs apply to a policy.
+
+    These are its declared languages (those with a pack) and the
+    languages detected in `sample`, the start of its text.  The text is
+    checked as well because most policies have no metadata yet and a
+    declared language need not be the only one a text uses.  If
+    neither yields a pack, every pack is applied.
+    """
+    languages = {language for language in declared if language in ALL_LANGUAGES}
+    languages.update(detect_languages(sample))
+    return tuple(sorted(languages)) if languages else ALL_LANGUAGES
+
+
+def language_skip(languages: Iterable[str]) -> FrozenSet[int]:
+    """Return the indices of the SCANNER patterns outside the packs of `languages`."""
+    applied = set(languages) | {NEUTRAL_PACK}
+    return frozenset(
+        index
+        for index, language in enumerate(PATTERN_LANGUAGES)
+        if language not in applied
+    )
+
+
+def declared_languages(value: str) -> Tuple[str, ...]:
+    """Parse the ``language`` field of policy metadata, e.g. "de" or "de, en"."""
+    return tuple(re.findall(r"[a-z]{2,3}", value.lower()))
+
+
+###############################################################################
+# Evidence
+###############################################################################
+
+class Evidence(NamedTuple):
+    """One rule match, with the sentence around it.
+
+    Offsets are character positions in the policy text as read (not
+    normalised); the page is counted from the form feeds that pdftotext
+    and pdf_to_text.py put after every page.
+    """
+
+    group: str            # rule group, e.g. "C1.strong_patterns"
+    pattern: int          # index of the pattern in SCANNER.patterns
+    start: int            # span of the match
+    end: int
+    quote_start: int      # span of the surrounding sentence
+    quote_end: int
+    page: int
+    quote: str
+    match: str
+
+
+# Quotes extend at most this many characters on either side of a match.
+MAX_QUOTE_CONTEXT = 300
+
+
+def sentence_bounds(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Return the span of the sentence around ``text[start:end]``.
+
+    The sentence runs from the last break before the match to the
+    first one after it (including a closing ``.``, ``!`` or ``?``),
+    without surrounding whitespace, and is capped at
+    MAX_QUOTE_CONTEXT characters on either side.
+    """
+    lo = max(0, start - MAX_QUOTE_CONTEXT)
+    hi = min(len(text), end + MAX_QUOTE_CONTEXT)
+    quote_start = lo
+    for m in SENTENCE_BREAK.finditer(text, lo, start):
+        quote_start = m.end()
+    m = SENTENCE_BREAK.search(text, end, hi)
+    if m is None:
+        quote_end = hi
+    else:
+        quote_end = m.end() if text[m.start()] in ".!?" else m.start()
+    while quote_start < start and text[quote_start].isspace():
+        quote_start += 1
+    while quote_end > end and text[quote_end - 1].isspace():
+        quote_end -= 1
+    return quote_start, quote_end
+
+
+def make_evidence(
+    window: str,
+    offsets: Sequence[int],
+    form_feeds: int,
+    group: str,
+    index: int,
+    start: int,
+    end: int,
+) -> Evidence:
+    """Build the Evidence for a match at ``window[start:end]``.
+
+    `window` is normalised text, `offsets` the original offset of each
+    of its characters and `form_feeds` the number of page breaks
+    before it.  The quote and match are taken from `window`; see
+    `restore_quotes`.
+    """
+    quote_start, quote_end = sentence_bounds(window, start, end)
+    return Evidence(
+        group=group,
+        pattern=index,
+        start=offsets[start],
+        end=offsets[end - 1] + 1,
+        quote_start=offsets[quote_start],
+        quote_end=offsets[quote_end - 1] + 1,
+        page=form_feeds + window.count("\f", 0, start) + 1,
+        quote=window[quote_start:quote_end],
+        match=window[start:end],
+    )
+
+
+def restore_quotes(evidence: List[Evidence], chunks: Iterable[str]) -> List[Evidence]:
+    """Return `evidence` with each quote and match cut from the original text.
+
+    `chunks` is the text as read, whole or in successive chunks; only
+    the text from the earliest quote not yet cut onwards is kept.
+    """
+    restored = list(evidence)
+    order = sorted(range(len(evidence)), key=lambda i: evidence[i].quote_start)
+    chunk_iter = iter(chunks)
+    buffer = ""
+    buffer_start = 0  # offset of `buffer` in the text
+    for i in order:
+        item = evidence[i]
+        while buffer_start + len(buffer) < item.quote_end:
+            chunk = next(chunk_iter, None)
+            if chunk is None:
+                break
+            drop = min(item.quote_start - buffer_start, len(buffer))
+            if drop > 0:
+                buffer = buffer[drop:]
+                buffer_start += drop
+            buffer += chunk
+        restored[i] = item._replace(
+            quote=buffer[item.quote_start - buffer_start : item.quote_end - buffer_start],
+            match=buffer[item.start - buffer_start : item.end - buffer_start],
+        )
+    return restored
+
+
 ###############################################################################
 # Heuristic classification functions
 ###############################################################################
 
-def classify_c1(text: str) -> float:
+# Each classifier receives the Document of a policy and maps the rule
+# groups found in it (``doc.hits``, see RuleScanner.scan) to a raw
+# value for its condition.
+
+def classify_c1(doc: Document) -> float:
     """Classify mandate vs request (C1).
 
     If the policy uses strong, binding language (e.g. “must”,
@@ -132,39 +1512,15 @@ def classify_c1(text: str) -> float:
     The search is case‑insensitive and looks for both English and
     German key words.
     """
-    t = text.lower()
-    # Strong mandate words
-    strong_patterns = [
-        r"\bmust\b",
-        r"\bshall\b",
-        r"\bar[e]? required\b",
-        r"\brequirement\b",
-        r"\bverpflichtet\b",  # German: obligated
-        r"\bpflicht\b",       # German: duty/obligation
-        r"\bmüssen\b",         # German: must
-    ]
-    # Weaker request words
-    weak_patterns = [
-        r"\bshould\b",
-        r"\bare encouraged\b",
-        r"\bencourage\b",
-        r"\brecommend\b",
-        r"\bsollten\b",    # German: should
-        r"\bempfehl[ea]n\b",  # German: recommend
-        r"\bsoll\b",      # German: shall/should (context ambiguous)
-    ]
-    # Check for strong and weak patterns
-    strong_found = any(re.search(p, t) for p in strong_patterns)
-    weak_found = any(re.search(p, t) for p in weak_patterns)
-    if strong_found:
+    if "C1.strong_patterns" in doc.hits:
         return 2.0
-    if weak_found:
+    if "C1.weak_patterns" in doc.hits:
         return 1.0
     # Default to request (minimum) if nothing found
     return CONDITION_BOUNDS["C1"][0]
 
 
-def classify_c2(text: str) -> float:
+def classify_c2(doc: Document) -> float:
     """Classify opt‑out provisions (C2).
 
     -1: Deposit opt‑out allowed and OA opt‑out allowed unconditionally.
@@ -175,29 +1531,9 @@ def classify_c2(text: str) -> float:
     presence or absence of opt‑out/waiver language.  If nothing is
     specified it defaults to 0 (midpoint between −1 and 2).
     """
-    t = text.lower()
-    # Patterns indicating that authors may choose not to deposit
-    deposit_optout_patterns = [
-        r"deposit.*\b(opt\-?out|waive)\b",
-        r"\bopt\-?out of deposit\b",
-        r"\bverzicht auf hinterlegung\b",  # German: opt out of deposit
-    ]
-    # Patterns indicating an opt‑out for open access but not deposit
-    oa_optout_patterns = [
-        r"open access.*\bopt\-?out\b",
-        r"\bopt\-?out of open access\b",
-        r"\bverzicht auf open access\b",
-        r"\bembargo.*upon request\b",
-    ]
-    # Patterns indicating no opt‑out (mandatory deposit & OA)
-    no_optout_patterns = [
-        r"\bno opt\-?out\b",
-        r"\bkeine ausnahme\b",  # German: no exception
-        r"\bwithout exception\b",
-    ]
-    deposit_optout = any(re.search(p, t) for p in deposit_optout_patterns)
-    oa_optout = any(re.search(p, t) for p in oa_optout_patterns)
-    no_optout = any(re.search(p, t) for p in no_optout_patterns)
+    deposit_optout = "C2.deposit_optout_patterns" in doc.hits
+    oa_optout = "C2.oa_optout_patterns" in doc.hits
+    no_optout = "C2.no_optout_patterns" in doc.hits
     # Determine classification
     if deposit_optout and oa_optout:
         # Both deposit and OA can be waived
@@ -211,7 +1547,7 @@ def classify_c2(text: str) -> float:
     return 0.0
 
 
-def classify_c3(text: str) -> float:
+def classify_c3(doc: Document) -> float:
     """Classify which version must be deposited (C3).
 
     Returns:
@@ -220,18 +1556,17 @@ def classify_c3(text: str) -> float:
       0.4 for explicit mention of an unrefereed preprint;
       0 for unspecified.
     """
-    t = text.lower()
-    if re.search(r"(author[^\n]{0,30}version|accepted manuscript|aam|autorenfassung)", t):
+    if "C3.author_version" in doc.hits:
         return 0.8
-    if re.search(r"(publisher[^\n]{0,30}version|version of record|vor)", t):
+    if "C3.publisher_version" in doc.hits:
         return 0.8
-    if re.search(r"preprint", t):
+    if "C3.preprint" in doc.hits:
         # Unrefereed preprint (if explicitly mentioned)
         return 0.4
     return 0.0
 
 
-def classify_c4(text: str) -> float:
+def classify_c4(doc: Document) -> float:
     """Classify deposit timing (C4).
 
     Values:
@@ -240,38 +1575,36 @@ def classify_c4(text: str) -> float:
         0.5 As soon as possible / promptly
         0   Unspecified or other
     """
-    t = text.lower()
-    if re.search(r"(time|upon) of acceptance|bei annahme|nach annahme", t):
+    if "C4.acceptance" in doc.hits:
         return 2.0
-    if re.search(r"(at|upon) publication|bei veröffentlichung|nach veröffentlichung", t):
+    if "C4.publication" in doc.hits:
         return 1.5
-    if re.search(r"as soon as possible|promptly|so bald wie möglich", t):
+    if "C4.asap" in doc.hits:
         return 0.5
     return 0.0
 
 
-def classify_c5(text: str) -> float:
+def classify_c5(doc: Document) -> float:
     """Classify embargo length (C5).
 
     Values:
-        0.5  6 months after publication
-       -2    12 months or more (including unspecified or publisher‑dictated)
+        0.5  6 months after publication
+       -2    12 months or more (including unspecified or publisher‑dictated)
     """
-    t = text.lower()
     # 6 months embargo
-    if re.search(r"(six|6)\\s+months?", t) and re.search(r"(embargo|after publication|nach veröffentlichung)", t):
+    if "C5.six_months" in doc.hits and "C5.embargo_context" in doc.hits:
         return 0.5
     # 12 months or more
-    if re.search(r"(twelve|12)\\s+months?|mehr als 12 monate|one year|ein jahr", t):
+    if "C5.twelve_months" in doc.hits:
         return -2.0
     # Generic statements deferring to publisher or unspecified period
-    if re.search(r"embargo|period stipulated by the publisher|verlag", t):
+    if "C5.publisher_period" in doc.hits:
         return -2.0
     # Unspecified: treat as worst case (−2)
     return -2.0
 
 
-def classify_c6(text: str) -> float:
+def classify_c6(doc: Document) -> float:
     """Classify copyright reservation (C6).
 
     Values:
@@ -280,76 +1613,52 @@ def classify_c6(text: str) -> float:
        -2:  No copyright reservation
         0:  Unspecified
     """
-    t = text.lower()
-    # Strong rights retention
-    strong_patterns = [
-        r"retain[\\s\\w]{0,20}non\\-exclusive rights",
-        r"grant[\\s\\w]{0,20}non\\-exclusive licence",
-        r"license[^\\n]{0,40}right[s]? to publisher",
-        r"copyright will be retained",
-        r"blanket copyright reservation",
-        r"autoren behalten das recht",  # German: authors retain the right
-    ]
-    # Weaker rights retention / opt‑out possible
-    medium_patterns = [
-        r"may opt out of rights reservation",
-        r"case\\-by\\-case basis",
-        r"authors should retain copyright",
-        r"authors should retain rights whenever possible",
-        r"any agreements must comply",
-        r"rechte sollten behalten",  # German: rights should be retained
-    ]
-    # Explicitly no rights reservation
-    negative_patterns = [
-        r"no copyright reservation",
-        r"copyright is transferred",
-        r"copyright assignment",
-        r"urheberrecht.*übertragen",  # German: copyright transferred
-    ]
-    if any(re.search(p, t) for p in strong_patterns):
+    if "C6.strong_patterns" in doc.hits:
         return 2.0
-    if any(re.search(p, t) for p in medium_patterns):
+    if "C6.medium_patterns" in doc.hits:
         return 1.0
-    if any(re.search(p, t) for p in negative_patterns):
+    if "C6.negative_patterns" in doc.hits:
         return -2.0
     # Unspecified
     return 0.0
 
 
-def classify_c7(text: str) -> float:
+def classify_c7(doc: Document) -> float:
     """Classify internal use requirement (C7).
 
     Returns 2 if the policy indicates that deposit is required for
     internal purposes such as performance reviews, promotion, or
     evaluation.  Otherwise returns 0.
     """
-    t = text.lower()
-    patterns = [
-        r"performance review",
-        r"performance evaluation",
-        r"promotion",
-        r"tenure",
-        r"internal use",
-        r"leistungsbewertung",    # German: performance evaluation
-        r"evaluationszwecke",     # German: evaluation purposes
-    ]
-    if any(re.search(p, t) for p in patterns):
+    if "C7.patterns" in doc.hits:
         return 2.0
     return 0.0
 
 
-def classify_c8(text: str) -> float:
+def classify_c8(doc: Document) -> float:
     """Classify whether theses/dissertations are covered (C8).
 
     Returns 2 if the policy explicitly refers to theses or
     dissertations; otherwise returns 0.
     """
-    t = text.lower()
-    if re.search(r"(thesis|theses|dissertation|doktorarbeit|abschlussarbeit)", t):
+    if "C8.patterns" in doc.hits:
         return 2.0
     return 0.0
 
 
+# Classifier for each condition, in output column order.
+CLASSIFIERS: Dict[str, Callable[[Document], float]] = {
+    "C1": classify_c1,
+    "C2": classify_c2,
+    "C3": classify_c3,
+    "C4": classify_c4,
+    "C5": classify_c5,
+    "C6": classify_c6,
+    "C7": classify_c7,
+    "C8": classify_c8,
+}
+
+
 def normalise(value: float, cond: str) -> float:
     """Normalise a raw value for condition `cond` to the [0, 1] range.
 
@@ -384,81 +1693,1152 @@ def score_policy(values: Dict[str, float], weights: Dict[str, float]) -> float:
     return round(total * 100, 2)
 
 
-def analyse_policy(text: str) -> Dict[str, float]:
-    """Return a dictionary of raw condition values for a given policy text."""
+def analyse_policy(
+    text: str,
+    conditions: Optional[Iterable[str]] = None,
+    evidence: Optional[List[Evidence]] = None,
+    skip: FrozenSet[int] = frozenset(),
+    cached: bool = False,
+) -> Dict[str, float]:
+    """Return a dictionary of raw condition values for a given policy text.
+
+    The text is made into one Document, scanned once for all rule
+    groups, and every condition is classified from that Document.  If
+    `conditions` is given, only those conditions are scanned and
+    returned.  If an `evidence` list is given, the same scan appends
+    every rule match to it.  `skip` is passed on to `RuleScanner.scan`,
+    and `cached` to `Document`.
+    """
+    wanted = list(CLASSIFIERS) if conditions is None else list(conditions)
+    doc = Document(text, cached)
+    known = 0 if evidence is None else len(evidence)
+    doc.hits = SCANNER.scan_document(doc, wanted, evidence, skip)
+    if evidence is not None:
+        evidence[known:] = restore_quotes(evidence[known:], [text])
+    return classify(doc, wanted)
+
+
+def classify(doc: Document, conditions: List[str]) -> Dict[str, float]:
+    """Apply the classifiers of `conditions` to a scanned Document."""
+    profiler = PROFILER
+    if profiler is None:
+        return {cond: CLASSIFIERS[cond](doc) for cond in conditions}
+    values = {}
+    for cond in conditions:
+        begin = time.perf_counter()
+        values[cond] = CLASSIFIERS[cond](doc)
+        profiler.add(profiler.classifiers, cond, time.perf_counter() - begin)
+    return values
+
+
+def read_policy(file_path: Path) -> Tuple[str, float]:
+    """Read a policy text whole; return it and the seconds the read took."""
+    begin = time.perf_counter()
+    content = file_path.read_text(encoding="utf-8", errors="ignore")
+    return content, time.perf_counter() - begin
+
+
+def prefetch(
+    file_paths: Iterable[Path], depth: int
+) -> Iterator[Tuple[Path, "concurrent.futures.Future[Tuple[str, float]]"]]:
+    """Yield each path with a future of its `read_policy` result.
+
+    Up to `depth` files are read ahead in a pool of as many threads,
+    so reading (which releases the GIL) overlaps with whatever the
+    caller does with the texts, while at most `depth` texts are held
+    at a time.
+    """
+    paths = iter(file_paths)
+    pending: deque = deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=depth) as pool:
+        for file_path in paths:
+            pending.append((file_path, pool.submit(read_policy, file_path)))
+            if len(pending) >= depth:
+                break
+        while pending:
+            file_path, future = pending.popleft()
+            following = next(paths, None)
+            if following is not None:
+                pending.append((following, pool.submit(read_policy, following)))
+            yield file_path, future
+
+
+def read_chunks(file_path: Path, chunk_size: int) -> Iterable[str]:
+    """Yield the text of a policy file in chunks of `chunk_size` characters.
+
+    The file is decoded exactly as ``Path.read_text`` would (UTF‑8,
+    undecodable bytes ignored, universal newlines), so the chunks
+    concatenate to the same text.
+    """
+    profiler = PROFILER
+    with file_path.open("r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            begin = time.perf_counter()
+            chunk = f.read(chunk_size)
+            if profiler is not None:
+                profiler.add(profiler.stages, "read", time.perf_counter() - begin)
+            if not chunk:
+                break
+            yield chunk
+
+
+def analyse_policy_file(
+    file_path: Path,
+    chunk_size: int,
+    conditions: Optional[Iterable[str]] = None,
+    evidence: Optional[List[Evidence]] = None,
+    skip: FrozenSet[int] = frozenset(),
+) -> Dict[str, float]:
+    """Like `analyse_policy`, but stream the policy from disk in chunks.
+
+    The text is normalised chunk by chunk (see `normalise_chunks`).
+    Peak memory depends on `chunk_size` and STREAM_OVERLAP, not on the
+    size of the document.
+    """
+    wanted = list(CLASSIFIERS) if conditions is None else list(conditions)
+    known = 0 if evidence is None else len(evidence)
+    hits = SCANNER.scan_chunks(
+        normalise_chunks(read_chunks(file_path, chunk_size)),
+        wanted,
+        STREAM_OVERLAP,
+        evidence,
+        skip,
+    )
+    if evidence is not None and len(evidence) > known:
+        # The quotes are cut from the file in a second streaming pass.
+        evidence[known:] = restore_quotes(
+            evidence[known:], read_chunks(file_path, chunk_size)
+        )
+    return classify(Document(None, hits=hits), wanted)
+
+
+def file_digest(file_path: Path, chunk_size: int) -> str:
+    """Return `text_digest` of a policy file without loading it whole."""
+    sha = hashlib.sha256()
+    for chunk in read_chunks(file_path, chunk_size):
+        sha.update(chunk.encode("utf-8"))
+    return sha.hexdigest()
+
+
+###############################################################################
+# Library API
+###############################################################################
+
+class TextScore(NamedTuple):
+    """The result of scoring one policy text (see `score_texts`)."""
+
+    values: Dict[str, float]        # raw C1–C8 values
+    initial_score: float
+    updated_score: float
+    languages: Tuple[str, ...]      # languages whose rule packs were applied
+
+
+def score_text(text: str, all_languages: bool = False) -> TextScore:
+    """Classify and score one policy text.
+
+    The rule packs applied are those of the languages detected in the
+    text (see `rule_languages`), as for a policy without metadata, or
+    every pack with `all_languages`.
+    """
+    applied = ALL_LANGUAGES if all_languages else rule_languages(text[:LANGUAGE_SAMPLE], ())
+    values = analyse_policy(text, skip=language_skip(applied))
+    return TextScore(
+        values,
+        score_policy(values, INITIAL_WEIGHTS),
+        score_policy(values, UPDATED_WEIGHTS),
+        applied,
+    )
+
+
+def score_texts(
+    texts: Iterable[str],
+    all_languages: bool = False,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> Iterator[TextScore]:
+    """Score policy texts, yielding a TextScore for each in order.
+
+    This is the entry point for using the scorer as a library: nothing
+    is read from or written to disk, and the rules are compiled once,
+    on the first call.  With an `executor` (e.g. a
+    ``ProcessPoolExecutor``) the texts are scored by its workers; all
+    texts are then submitted at once.
+    """
+    if executor is None:
+        for text in texts:
+            yield score_text(text, all_languages)
+    else:
+        texts = list(texts)
+        yield from executor.map(score_text, texts, [all_languages] * len(texts))
+
+
+###############################################################################
+# Result cache
+###############################################################################
+
+def condition_fingerprints() -> Dict[str, str]:
+    """Return a SHA‑256 fingerprint of everything that determines each condition.
+
+    A condition's fingerprint covers its patterns in each of the
+    RULE_PACKS, its entry in CONDITION_BOUNDS and the source of its
+    classifier, so any edit to one of those changes the fingerprint of
+    that condition only.  It also covers NORMALISATION_KEY, since the
+    text normalisation affects every condition.
+    """
+    fingerprints = {}
+    for cond, classify in CLASSIFIERS.items():
+        payload = json.dumps(
+            {
+                "rules": {
+                    language: pack.get(cond, {}) for language, pack in RULE_PACKS.items()
+                },
+                "bounds": CONDITION_BOUNDS[cond],
+                "classifier": inspect.getsource(classify),
+                "normalisation": NORMALISATION_KEY,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        fingerprints[cond] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return fingerprints
+
+
+def text_digest(text: str) -> str:
+    """Return the SHA‑256 hex digest of a policy text (UTF‑8 encoded)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """Persistent cache of raw condition values keyed by text digest.
+
+    Each entry maps a text digest to the raw C1–C8 values computed for
+    it, the condition fingerprints those values were computed under
+    and the time the entry was last used.  A cached value is only
+    served while its fingerprint matches the current one.  When the
+    cache is saved, the least recently used entries beyond
+    `max_entries` are evicted.  A missing or unreadable cache file is
+    treated as empty.
+
+    Between saves, every store is also appended to a journal next to
+    the cache file and flushed at once.  The journal is replayed when
+    the cache is loaded and removed when it is saved, so it serves as
+    the checkpoint of a run: after an interrupted run, the policies it
+    finished are served from the cache and only the rest are
+    classified.  ``recovered`` counts the journal entries replayed.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_CACHE_SIZE) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.journal_path = path.with_suffix(".journal")
+        self.entries: Dict[str, dict] = {}
+        self.recovered = 0
+        self._journal = None
+        if path.is_file():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as exc:
+                print(f"Warning: ignoring unreadable cache {path}: {exc}")
+            else:
+                if data.get("version") == self.VERSION:
+                    self.entries = data.get("entries", {})
+        if self.journal_path.is_file():
+            with self.journal_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        digest, values, fingerprints, last_used = json.loads(line)
+                    except ValueError:
+                        break  # cut off by the interruption
+                    self._update(digest, values, fingerprints, last_used)
+                    self.recovered += 1
+
+    def lookup(
+        self, digest: str, fingerprints: Dict[str, str]
+    ) -> Tuple[Dict[str, float], List[str]]:
+        """Return the still‑valid cached values and the stale conditions."""
+        entry = self.entries.get(digest)
+        if entry is None:
+            return {}, list(fingerprints)
+        cached = {}
+        stale = []
+        for cond, fingerprint in fingerprints.items():
+            if entry["fingerprints"].get(cond) == fingerprint and cond in entry["values"]:
+                cached[cond] = entry["values"][cond]
+            else:
+                stale.append(cond)
+        return cached, stale
+
+    def store(
+        self, digest: str, values: Dict[str, float], fingerprints: Dict[str, str]
+    ) -> None:
+        """Record freshly computed values for a text digest and mark it used.
+
+        Fresh values are journaled before this returns.
+        """
+        fingerprints = {cond: fingerprints[cond] for cond in values}
+        last_used = time.time()
+        self._update(digest, values, fingerprints, last_used)
+        if values:
+            if self._journal is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._journal = self.journal_path.open("a", encoding="utf-8")
+            self._journal.write(
+                json.dumps([digest, values, fingerprints, last_used]) + "\n"
+            )
+            self._journal.flush()
+
+    def _update(
+        self,
+        digest: str,
+        values: Dict[str, float],
+        fingerprints: Dict[str, str],
+        last_used: float,
+    ) -> None:
+        entry = self.entries.setdefault(digest, {"values": {}, "fingerprints": {}})
+        for cond, value in values.items():
+            entry["values"][cond] = value
+            entry["fingerprints"][cond] = fingerprints[cond]
+        entry["last_used"] = last_used
+
+    def save(self) -> None:
+        """Evict old entries, write the cache atomically and clear the journal."""
+        if len(self.entries) > self.max_entries:
+            keep = sorted(
+                self.entries, key=lambda d: self.entries[d]["last_used"], reverse=True
+            )[: self.max_entries]
+            self.entries = {digest: self.entries[digest] for digest in keep}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self.journal_path.is_file():
+            os.remove(self.journal_path)
+
+
+###############################################################################
+# Corpus processing
+###############################################################################
+
+class PolicyResult(NamedTuple):
+    """Outcome of reading and classifying one policy file."""
+
+    policy_file: str
+    values: Dict[str, float]
+    digest: Optional[str] = None        # cache key: text SHA‑256 (and rule packs)
+    fresh: Dict[str, float] = {}        # values computed in this run
+    error: Optional[str] = None         # read error, if any
+    profile: Optional[dict] = None      # Profiler.drain() of a pool worker
+    evidence: Optional[List[Evidence]] = None  # rule matches (--snippets)
+    languages: Tuple[str, ...] = ()     # languages whose rule packs were applied
+
+
+def process_policy(
+    file_path: Path,
+    cache: Optional[ScoreCache],
+    fingerprints: Dict[str, str],
+    chunk_size: Optional[int] = None,
+    snippets: bool = False,
+    skip: FrozenSet[int] = frozenset(),
+    languages: Optional[Tuple[str, ...]] = None,
+    prefetched: Optional["concurrent.futures.Future[Tuple[str, float]]"] = None,
+) -> PolicyResult:
+    """Read one policy file and return its raw condition values.
+
+    Conditions with a valid cached value are taken from `cache`
+    (which is only read, never modified); the rest are classified.
+    If `chunk_size` is given the file is streamed in chunks instead of
+    being read whole (when caching, it is read once to hash it and
+    again only if some condition needs classifying).  With `snippets`
+    every condition is classified, since cached values carry no
+    evidence, and the rule matches are returned with the values.
+    When caching, the normalised text and segmentation of a classified
+    text are kept in NORMALISED_DIR and SEGMENTS_DIR as well.  Patterns in `skip` are not evaluated (see
+    `RuleScanner.scan`).  If `languages` is given (the policy's
+    declared languages, possibly none), only the rule packs of those
+    and of the languages detected in the text are applied (see
+    `rule_languages`), and the applied packs become part of the cache
+    key; otherwise every pack is applied.  `prefetched` is the pending
+    `read_policy` of the file (see `prefetch`), used instead of
+    reading it here when the file is read whole.
+    """
+    evidence: Optional[List[Evidence]] = [] if snippets else None
+    applied = ALL_LANGUAGES
+    try:
+        if chunk_size:
+            if languages is not None:
+                with file_path.open("r", encoding="utf-8", errors="ignore") as f:
+                    applied = rule_languages(f.read(LANGUAGE_SAMPLE), languages)
+                skip = skip | language_skip(applied)
+            if cache is None:
+                values = analyse_policy_file(
+                    file_path, chunk_size, None, evidence, skip
+                )
+                return PolicyResult(
+                    file_path.name, values, evidence=evidence, languages=applied
+                )
+            digest = file_digest(file_path, chunk_size)
+        else:
+            if prefetched is None:
+                content, seconds = read_policy(file_path)
+            else:
+                content, seconds = prefetched.result()
+            if PROFILER is not None:
+                PROFILER.add(PROFILER.stages, "read", seconds)
+            if languages is not None:
+                applied = rule_languages(content[:LANGUAGE_SAMPLE], languages)
+                skip = skip | language_skip(applied)
+            if cache is None:
+                values = analyse_policy(content, None, evidence, skip)
+                return PolicyResult(
+                    file_path.name, values, evidence=evidence, languages=applied
+                )
+            digest = text_digest(content)
+        if languages is not None:
+            digest = f"{digest}:{'+'.join(applied)}"
+        cached, stale = cache.lookup(digest, fingerprints)
+        if snippets:
+            cached, stale = {}, list(CLASSIFIERS)
+        if not stale:
+            fresh = {}
+        elif chunk_size:
+            fresh = analyse_policy_file(file_path, chunk_size, stale, evidence, skip)
+        else:
+            fresh = analyse_policy(content, stale, evidence, skip, cached=True)
+    except OSError as exc:
+        return PolicyResult(file_path.name, {}, error=str(exc))
+    cached.update(fresh)
+    values = {cond: cached[cond] for cond in CLASSIFIERS}
+    return PolicyResult(
+        file_path.name, values, digest, fresh, evidence=evidence, languages=applied
+    )
+
+
+# Per‑process state of pool workers, set up by _init_worker.
+_worker_cache: Optional[ScoreCache] = None
+_worker_fingerprints: Dict[str, str] = {}
+_worker_chunk_size: Optional[int] = None
+_worker_snippets = False
+_worker_skips: Dict[str, FrozenSet[int]] = {}
+_worker_languages: Optional[Dict[str, Tuple[str, ...]]] = None
+
+
+def _init_worker(
+    cache_path: Optional[Path],
+    fingerprints: Dict[str, str],
+    chunk_size: Optional[int],
+    profile: bool = False,
+    snippets: bool = False,
+    skips: Optional[Dict[str, FrozenSet[int]]] = None,
+    languages: Optional[Dict[str, Tuple[str, ...]]] = None,
+) -> None:
+    global _worker_cache, _worker_fingerprints, _worker_chunk_size, _worker_snippets
+    global _worker_skips, _worker_languages, PROFILER
+    _worker_cache = None if cache_path is None else ScoreCache(cache_path)
+    _worker_fingerprints = fingerprints
+    _worker_chunk_size = chunk_size
+    _worker_snippets = snippets
+    _worker_skips = skips or {}
+    _worker_languages = languages
+    PROFILER = Profiler() if profile else None
+
+
+def _process_in_worker(file_path: Path) -> PolicyResult:
+    result = process_policy(
+        file_path,
+        _worker_cache,
+        _worker_fingerprints,
+        _worker_chunk_size,
+        _worker_snippets,
+        _worker_skips.get(file_path.name, frozenset()),
+        None if _worker_languages is None else _worker_languages.get(file_path.name, ()),
+    )
+    if PROFILER is not None:
+        result = result._replace(profile=PROFILER.drain())
+    return result
+
+
+def process_corpus(
+    file_paths: List[Path],
+    cache: Optional[ScoreCache],
+    fingerprints: Dict[str, str],
+    jobs: int = 1,
+    chunk_size: Optional[int] = None,
+    snippets: bool = False,
+    skips: Optional[Dict[str, FrozenSet[int]]] = None,
+    languages: Optional[Dict[str, Tuple[str, ...]]] = None,
+    prefetch_depth: int = 0,
+) -> Iterable[PolicyResult]:
+    """Yield a PolicyResult for each file, in the order of `file_paths`.
+
+    Results are yielded as soon as they are ready.  Run serially, the
+    next `prefetch_depth` files are read in background threads while
+    the current one is classified (not in streaming mode, which reads
+    each file as it scans it).  With ``jobs > 1`` the files are
+    processed in a pool of worker processes, which read in parallel
+    anyway.  Files are handed out in chunks to keep inter‑process
+    overhead low, and results are yielded in input order so the
+    output does not depend on the number of workers.  Each worker
+    loads its own read‑only copy of the cache; all cache updates are
+    made by the caller.  When profiling, each worker profiles into
+    its own Profiler and returns the counters with every result.
+    `skips` maps file names to the patterns to skip for them, and
+    `languages` maps file names to their declared languages for rule
+    pack dispatch (None applies every pack to every file).
+    """
+    skips = skips or {}
+    if jobs <= 1 or len(file_paths) <= 1:
+        if prefetch_depth > 0 and not chunk_size:
+            reads = prefetch(file_paths, prefetch_depth)
+        else:
+            reads = ((file_path, None) for file_path in file_paths)
+        for file_path, prefetched in reads:
+            yield process_policy(
+                file_path,
+                cache,
+                fingerprints,
+                chunk_size,
+                snippets,
+                skips.get(file_path.name, frozenset()),
+                None if languages is None else languages.get(file_path.name, ()),
+                prefetched,
+            )
+        return
+    chunksize = max(1, len(file_paths) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(
+            None if cache is None else cache.path,
+            fingerprints,
+            chunk_size,
+            PROFILER is not None,
+            snippets,
+            skips,
+            languages,
+        ),
+    ) as pool:
+        yield from pool.map(_process_in_worker, file_paths, chunksize=chunksize)
+
+
+# Fields of the policy metadata (see policy_metadata.py) joined into
+# the output tables.
+METADATA_COLUMNS = ["institution", "year", "language"]
+
+# Columns of the output tables.  "rule_languages" lists the languages
+# whose rule packs were applied.
+FIELDNAMES = [
+    "policy_file",
+    *METADATA_COLUMNS,
+    "rule_languages",
+    "C1",
+    "C2",
+    "C3",
+    "C4",
+    "C5",
+    "C6",
+    "C7",
+    "C8",
+    "initial_score",
+    "updated_score",
+]
+
+
+class TableWriter:
+    """Write result rows to a CSV file and its tab‑separated twin as they arrive.
+
+    Rows are written to both tables as soon as they are produced, so
+    no table is built up in memory.  The tables are written to
+    temporary files that replace the old ones
+    when the writer is closed, so readers never see a partially
+    written table; if the ``with`` block is left by an exception, the
+    temporary files are removed and the old tables are kept.
+    """
+
+    def __init__(self, output_csv: Path) -> None:
+        # Create output directory if necessary
+        output_csv.parent.mkdir(parents=True, exist_ok=True)
+        # Write CSV and a TSV version for QA validation (tab‑separated).
+        # The TSV mirrors the CSV content but uses a .tsv extension.
+        # Having a TSV available allows qa/lint_tables.py to discover and
+        # validate it automatically when run without arguments.
+        self.paths = [output_csv, output_csv.with_suffix(".tsv")]
+        self.tmp_paths = [path.with_name(f".{path.name}.tmp") for path in self.paths]
+        self.files = [
+            tmp_path.open("w", newline="", encoding="utf-8") for tmp_path in self.tmp_paths
+        ]
+        self.writers = [
+            csv.DictWriter(self.files[0], fieldnames=FIELDNAMES),
+            csv.DictWriter(self.files[1], fieldnames=FIELDNAMES, delimiter="\t"),
+        ]
+        for writer in self.writers:
+            writer.writeheader()
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        for f in self.files:
+            f.close()
+        if exc_type is not None:
+            for tmp_path in self.tmp_paths:
+                tmp_path.unlink()
+            return
+        for tmp_path, path in zip(self.tmp_paths, self.paths):
+            os.replace(tmp_path, path)
+
+    def write(self, row: dict) -> None:
+        """Append one row to both tables."""
+        for writer in self.writers:
+            writer.writerow(row)
+
+
+def write_tables(rows: Iterable[dict], output_csv: Path) -> None:
+    """Write result rows to `output_csv` and a tab‑separated twin.
+
+    Both tables are written in a single pass over `rows` (see
+    TableWriter).
+    """
+    with TableWriter(output_csv) as tables:
+        for row in rows:
+            tables.write(row)
+
+
+def require_pyarrow() -> None:
+    """Import pyarrow for the columnar functions; RuntimeError if it is missing."""
+    global pa, pc, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("--columnar requires pyarrow: pip install pyarrow") from None
+    pa, pc, pq = pyarrow, pyarrow.compute, pyarrow.parquet
+
+
+def columnar_schema() -> "pa.Schema":
+    """Return the Arrow schema of the columnar score table."""
+    text_fields = [*METADATA_COLUMNS, "rule_languages"]
+    return pa.schema(
+        [pa.field("policy_file", pa.string(), nullable=False)]
+        + [pa.field(name, pa.string()) for name in text_fields]
+        + [pa.field(name, pa.float64()) for name in FIELDNAMES[len(text_fields) + 1:]]
+    )
+
+
+def read_columnar(path: Path) -> Optional["pa.Table"]:
+    """Read a Parquet or Arrow IPC score table, or return None if there is none."""
+    if not path.is_file():
+        return None
+    if path.suffix == ".parquet":
+        return pq.read_table(str(path))
+    with pa.OSFile(str(path)) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def write_columnar(table: "pa.Table", path: Path) -> None:
+    """Write a score table atomically as Parquet or Arrow IPC (by suffix)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    if path.suffix == ".parquet":
+        pq.write_table(table, str(tmp_path))
+    else:
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def upsert_columnar(path: Path, rows: List[dict]) -> Tuple["pa.Table", int]:
+    """Merge `rows` into the columnar table at `path`, keyed by policy_file.
+
+    Rows that are new or differ from the stored row for their policy
+    replace it, and stored rows of policies missing from `rows` are
+    dropped; all other stored rows are kept as they are.  The file is
+    only rewritten if anything changed.  Returns the resulting table,
+    sorted by policy_file, and the number of rows upserted or removed.
+    """
+    schema = columnar_schema()
+    existing = read_columnar(path)
+    if existing is not None and not existing.schema.equals(schema):
+        existing = None  # written by an older layout: rebuild
+    stored = {} if existing is None else {
+        row["policy_file"]: row for row in existing.to_pylist()
+    }
+    names = {row["policy_file"] for row in rows}
+    upserts = [row for row in rows if stored.get(row["policy_file"]) != row]
+    removed = set(stored) - names
+    if existing is not None and not upserts and not removed:
+        return existing, 0
+    if existing is None:
+        kept = schema.empty_table()
+    else:
+        keep = pa.array(sorted(names - {row["policy_file"] for row in upserts}), pa.string())
+        kept = existing.filter(pc.is_in(existing["policy_file"], value_set=keep))
+    table = pa.concat_tables(
+        [kept, pa.Table.from_pylist(upserts, schema=schema)]
+    ).sort_by("policy_file")
+    write_columnar(table, path)
+    return table, len(upserts) + len(removed)
+
+
+def write_outputs(rows: List[dict], columnar: Optional[str]) -> Optional[int]:
+    """Write the score tables; return the columnar upsert count, if any.
+
+    With a `columnar` format the rows are also upserted into the
+    columnar table.  The CSV/TSV views are written from `rows`, which
+    hold the same values in the same order, because the float64
+    columns would print the integer default of C1 as ``1.0`` instead
+    of ``1``.
+    """
+    changed = None
+    if columnar is not None:
+        path = OUTPUT_CSV.with_suffix(COLUMNAR_SUFFIXES[columnar])
+        _, changed = upsert_columnar(path, rows)
+    write_tables(rows, OUTPUT_CSV)
+    return changed
+
+
+def result_row(result: PolicyResult, metadata: Optional[Dict[str, str]] = None) -> dict:
+    """Return the output table row for a successfully processed policy.
+
+    `metadata` holds the policy's metadata fields (empty if it has none).
+    """
+    metadata = metadata or {}
     return {
-        "C1": classify_c1(text),
-        "C2": classify_c2(text),
-        "C3": classify_c3(text),
-        "C4": classify_c4(text),
-        "C5": classify_c5(text),
-        "C6": classify_c6(text),
-        "C7": classify_c7(text),
-        "C8": classify_c8(text),
+        "policy_file": result.policy_file,
+        **{column: metadata.get(column, "") for column in METADATA_COLUMNS},
+        "rule_languages": "+".join(result.languages),
+        **result.values,
+        "initial_score": score_policy(result.values, INITIAL_WEIGHTS),
+        "updated_score": score_policy(result.values, UPDATED_WEIGHTS),
     }
 
 
-def main() -> None:
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a ``--shard`` value ``i/n`` (1 ≤ i ≤ n) into (i, n)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, e.g. 1/4, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} of {count} does not exist")
+    return index, count
+
+
+def shard_of(policy_id: str, count: int) -> int:
+    """Return the shard (1 to `count`) of the policy with ID `policy_id`.
+
+    The shard is taken from the SHA‑256 of the ``COUNTRY_SECTOR_ID``
+    policy ID (see `policy_id_prefix`), so every node computes the same
+    partition without coordination, shards stay balanced as countries
+    are added, and all files of one policy ID (e.g. its ``_de`` and
+    ``_en`` versions) fall into the same shard.
+    """
+    digest = hashlib.sha256(policy_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def shard_csv(index: int, count: int) -> Path:
+    """Return the path of the partial CSV table of shard `index` of `count`."""
+    return SHARDS_DIR / f"{OUTPUT_CSV.stem}.shard-{index}-of-{count}.csv"
+
+
+def text_signatures() -> Dict[str, Tuple[int, int]]:
+    """Return {file name: (size, mtime in ns)} for every policy text."""
+    signatures = {}
+    with os.scandir(POLICIES_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(".txt") and entry.is_file():
+                stat = entry.stat()
+                signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+def watch(
+    rows: List[dict],
+    cache: Optional[ScoreCache],
+    fingerprints: Dict[str, str],
+    args: argparse.Namespace,
+) -> None:
+    """Rescore new and changed policy texts until interrupted.
+
+    The policies directory is polled every ``args.interval`` seconds
+    by comparing file sizes and modification times.  Only new or
+    changed files are read and classified (in this process, with the
+    rules compiled at startup); rows of deleted files are dropped.
+    After every change both tables are rewritten atomically from the
+    rows held in memory and the cache is saved.
+    """
+    from policy_metadata import load_metadata, metadata_for
+
+    by_file = {row["policy_file"]: row for row in rows}
+    seen = text_signatures()
+    print(f"Watching {POLICIES_DIR} for changes (Ctrl+C to stop).")
+    try:
+        while True:
+            time.sleep(args.interval)
+            current = text_signatures()
+            changed = sorted(name for name, sig in current.items() if seen.get(name) != sig)
+            removed = sorted(set(seen) - set(current))
+            if not changed and not removed:
+                continue
+            begin = time.perf_counter()
+            seen = current
+            for name in removed:
+                by_file.pop(name, None)
+            metadata = metadata_for(changed, load_metadata())
+            for name in changed:
+                result = process_policy(
+                    POLICIES_DIR / name,
+                    cache,
+                    fingerprints,
+                    args.chunk_size,
+                    args.snippets,
+                    languages=policy_languages(name, metadata, args),
+                )
+                if result.error is not None:
+                    # Possibly deleted or replaced while being read; a
+                    # later poll picks up the new version.
+                    print(f"Warning: could not read {name}: {result.error}")
+                    by_file.pop(name, None)
+                    continue
+                if cache is not None:
+                    cache.store(result.digest, result.fresh, fingerprints)
+                if result.evidence is not None:
+                    write_snippets(Path(name).stem, result.evidence)
+                row = by_file[name] = result_row(result, metadata.get(name))
+                print(
+                    f"{name}: initial={row['initial_score']:.2f}, "
+                    f"updated={row['updated_score']:.2f}"
+                )
+            write_outputs([by_file[name] for name in sorted(by_file)], args.columnar)
+            if cache is not None:
+                cache.save()
+                prune_artefacts(digest.split(":")[0] for digest in cache.entries)
+            for name in removed:
+                print(f"{name}: removed")
+            print(
+                f"Updated {OUTPUT_CSV.name} ({len(by_file)} policies) in "
+                f"{(time.perf_counter() - begin) * 1000:.0f} ms."
+            )
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def write_snippets(
+    policy_id: str, evidence: List[Evidence], directory: Path = SNIPPETS_DIR
+) -> int:
+    """Write a policy's rule matches as snippets; return how many were written.
+
+    Each record follows templates/snippet_schema.json, with the
+    matched sentence as the quote and the code from SNIPPET_CODES.
+    Matches with the same code in the same sentence are merged into
+    one snippet whose note lists the rules.  The records go to
+    ``<directory>/<policy_id>/auto_snippets.jsonl`` with a line‑aligned
+    ``auto_anchors.csv`` holding the page and character span of each
+    quote in the text file; hand‑coded ``snippets.jsonl`` files are
+    left alone.  Nothing is written for a policy without matches
+    unless it already has a snippet directory.
+    """
+    snippets: Dict[Tuple[int, int, str], dict] = {}
+    for ev in sorted(evidence, key=lambda e: (e.quote_start, e.start, e.pattern)):
+        code = SNIPPET_CODES[ev.group]
+        rule = SCANNER.patterns[ev.pattern]
+        rule_text = rule if isinstance(rule, str) else repr(rule)
+        source = f'{ev.group} "{ev.match}" ({rule_text})'
+        snippet = snippets.setdefault(
+            (ev.quote_start, ev.quote_end, code),
+            {"page": ev.page, "quote": ev.quote, "code": code, "sources": []},
+        )
+        if source not in snippet["sources"]:
+            snippet["sources"].append(source)
+
+    policy_dir = directory / policy_id
+    if not snippets and not policy_dir.is_dir():
+        return 0
+    policy_dir.mkdir(parents=True, exist_ok=True)
+    records = []
+    anchors = ["page,start_char,end_char\n"]
+    for (quote_start, quote_end, _), snippet in snippets.items():
+        records.append(
+            json.dumps(
+                {
+                    "policy_id": policy_id,
+                    "page": snippet["page"],
+                    "quote": snippet["quote"],
+                    "code": snippet["code"],
+                    "note": "Rule match (compute_policy_scores.py): "
+                    + "; ".join(snippet["sources"]),
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+        anchors.append(f"{snippet['page']},{quote_start},{quote_end}\n")
+    for name, lines in (("auto_snippets.jsonl", records), ("auto_anchors.csv", anchors)):
+        path = policy_dir / name
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", newline="", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+    return len(records)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command‑line options of the scorer."""
+    parser = argparse.ArgumentParser(
+        description="Estimate MELIBEA OA mandate strength for all policy texts."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Classify every policy from scratch and leave the cache untouched",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"Maximum number of policies kept in the cache (default: {DEFAULT_CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes (default: 1; 0 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        metavar="CHARS",
+        help="Stream each policy in chunks of this many characters "
+        "instead of reading it whole (bounds memory for very large texts)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH,
+        metavar="N",
+        help="Read up to N policies ahead in background threads while classifying "
+        f"(default: {DEFAULT_PREFETCH}; 0 reads each policy when it is classified)",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Update the policy_index.py index and use it to skip rules "
+        "that cannot match a policy",
+    )
+    parser.add_argument(
+        "--snippets",
+        action="store_true",
+        help="Write every rule match as evidence snippets to snippets/by_policy/",
+    )
+    parser.add_argument(
+        "--columnar",
+        choices=sorted(COLUMNAR_SUFFIXES),
+        default=None,
+        help="Also keep the scores in policy_scores.parquet or policy_scores.arrow, "
+        "updating only changed rows (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the full run, keep rescoring new and changed policies",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="Polling interval of --watch (default: 0.5)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Time every stage, classifier and pattern and write {PROFILE_JSON.name}",
+    )
+    parser.add_argument(
+        "--all-languages",
+        action="store_true",
+        help="Apply every language's rule pack to every policy",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Only score shard I of N of the corpus and write a partial table to "
+        f"{SHARDS_DIR.name}/ (combine shards with merge_score_shards.py)",
+    )
+    args = parser.parse_args(argv)
+    if args.cache_size < 1:
+        parser.error("--cache-size must be at least 1")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.interval <= 0:
+        parser.error("--interval must be greater than 0")
+    if args.shard is not None and (args.watch or args.columnar):
+        parser.error("--shard cannot be combined with --watch or --columnar")
+    return args
+
+
+def policy_languages(
+    name: str, metadata: Dict[str, Dict[str, str]], args: argparse.Namespace
+) -> Optional[Tuple[str, ...]]:
+    """Return the declared languages of a policy for `process_policy`.
+
+    Returns None (apply every rule pack) with ``--all-languages``.
+    """
+    if args.all_languages:
+        return None
+    return declared_languages(metadata.get(name, {}).get("language", ""))
+
+
+def write_profile(
+    profiler: Profiler, args: argparse.Namespace, jobs: int, policies: int, classified: int
+) -> None:
+    """Write the --profile report as JSON next to the output tables."""
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "policies": policies,
+        # Cached policies are not classified; use --no-cache to profile all.
+        "policies_classified": classified,
+        "jobs": jobs,
+        "chunk_size": args.chunk_size,
+        **profiler.report(SCANNER),
+    }
+    PROFILE_JSON.parent.mkdir(parents=True, exist_ok=True)
+    with PROFILE_JSON.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    global PROFILER
+    args = parse_args(argv)
     # Ensure the policies directory exists
     if not POLICIES_DIR.is_dir():
         raise RuntimeError(f"Policies directory not found: {POLICIES_DIR}")
+    if args.columnar:
+        require_pyarrow()
+    started = time.perf_counter()
+    PROFILER = Profiler() if args.profile else None
 
-    # Collect result rows
+    cache = None if args.no_cache else ScoreCache(CACHE_PATH, args.cache_size)
+    fingerprints = condition_fingerprints()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache_hits = 0
+    classified = 0
+    snippet_count = 0
+    processed = 0
+    write_seconds = 0.0
+    if cache is not None and cache.recovered:
+        print(f"Resuming: {cache.recovered} results of an interrupted run are cached.")
+
+    # Rows are only held for --columnar and --watch; the CSV and TSV
+    # are written as the rows are produced.
     rows = []
-    for file_path in sorted(POLICIES_DIR.glob("*.txt")):
-        try:
-            content = file_path.read_text(encoding="utf-8", errors="ignore")
-        except Exception as exc:
-            print(f"Warning: could not read {file_path.name}: {exc}")
-            continue
-        values = analyse_policy(content)
-        initial_score = score_policy(values, INITIAL_WEIGHTS)
-        updated_score = score_policy(values, UPDATED_WEIGHTS)
-        row = {
-            "policy_file": file_path.name,
-            **values,
-            "initial_score": initial_score,
-            "updated_score": updated_score,
-        }
-        rows.append(row)
-
-    # Create output directory if necessary
-    OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
-    # Write CSV
-    fieldnames = [
-        "policy_file",
-        "C1",
-        "C2",
-        "C3",
-        "C4",
-        "C5",
-        "C6",
-        "C7",
-        "C8",
-        "initial_score",
-        "updated_score",
-    ]
-    with OUTPUT_CSV.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    # Write TSV version for QA validation (tab‑separated).  This file
-    # mirrors the CSV content but uses a .tsv extension.  Having a TSV
-    # available allows qa/lint_tables.py to discover and validate it
-    # automatically when run without arguments.
-    output_tsv = OUTPUT_CSV.with_suffix(".tsv")
-    with output_tsv.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter="\t")
-        writer.writeheader()
-        writer.writerows(rows)
+    keep_rows = args.columnar is not None or args.watch
+    # Imported here so that importing this module (e.g. for
+    # score_texts) does not load PyYAML.
+    from policy_metadata import load_metadata, metadata_for, policy_id_prefix
+
+    file_paths = sorted(POLICIES_DIR.glob("*.txt"))
+    output_csv = OUTPUT_CSV
+    if args.shard is not None:
+        shard, shard_count = args.shard
+        file_paths = [
+            p for p in file_paths if shard_of(policy_id_prefix(p.stem), shard_count) == shard
+        ]
+        output_csv = shard_csv(shard, shard_count)
+    names = [p.name for p in file_paths]
+    metadata = metadata_for(names, load_metadata())
+    languages = None if args.all_languages else {
+        name: policy_languages(name, metadata, args) for name in names
+    }
+    skips = None
+    if args.index:
+        # Imported here because policy_index itself imports this module.
+        from policy_index import PolicyIndex
+
+        with PolicyIndex() as index:
+            index.update(file_paths)
+            skips = index.pattern_skips(SCANNER.patterns, names)
+    with TableWriter(output_csv) as tables:
+        for result in process_corpus(
+            file_paths,
+            cache,
+            fingerprints,
+            jobs,
+            args.chunk_size,
+            args.snippets,
+            skips,
+            languages,
+            args.prefetch,
+        ):
+            if result.error is not None:
+                print(f"Warning: could not read {result.policy_file}: {result.error}")
+                continue
+            if result.profile is not None:
+                PROFILER.merge(result.profile)
+            if cache is None or result.fresh:
+                classified += 1
+            if result.evidence is not None:
+                snippet_count += write_snippets(
+                    Path(result.policy_file).stem, result.evidence
+                )
+            if cache is not None:
+                cache.store(result.digest, result.fresh, fingerprints)
+                if not result.fresh:
+                    cache_hits += 1
+            row = result_row(result, metadata.get(result.policy_file))
+            processed += 1
+            if keep_rows:
+                rows.append(row)
+            begin = time.perf_counter()
+            tables.write(row)
+            write_seconds += time.perf_counter() - begin
+            print(
+                f"{row['policy_file']}: initial={row['initial_score']:.2f}, updated={row['updated_score']:.2f}"
+            )
+        begin = time.perf_counter()
+    upserted = None
+    if args.columnar is not None:
+        columnar_path = OUTPUT_CSV.with_suffix(COLUMNAR_SUFFIXES[args.columnar])
+        _, upserted = upsert_columnar(columnar_path, rows)
+    write_seconds += time.perf_counter() - begin
+    if PROFILER is not None:
+        PROFILER.add(PROFILER.stages, "write_tables", write_seconds)
+
+    if cache is not None:
+        cache.save()
+        prune_artefacts(digest.split(":")[0] for digest in cache.entries)
+
+    if PROFILER is not None:
+        PROFILER.add(PROFILER.stages, "total", time.perf_counter() - started)
+        write_profile(PROFILER, args, jobs, processed, classified)
+        PROFILER = None
 
     # Print summary to console
-    print(f"Processed {len(rows)} policy files.")
-    for row in rows:
-        print(
-            f"{row['policy_file']}: initial={row['initial_score']:.2f}, updated={row['updated_score']:.2f}"
-        )
+    print(f"Processed {processed} policy files.")
+    if cache is not None:
+        print(f"Served {cache_hits} of {processed} policies from cache.")
+    if args.shard is not None:
+        print(f"Wrote shard {shard} of {shard_count} to {output_csv}.")
+    if args.snippets:
+        print(f"Wrote {snippet_count} evidence snippets to {SNIPPETS_DIR}.")
+    if upserted is not None:
+        print(f"Upserted or removed {upserted} rows in {columnar_path.name}.")
+
+    if args.watch:
+        watch(rows, cache, fingerprints, args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+"""
+merge_score_shards.py
+=====================
+
+Combine the partial score tables written by
+``compute_policy_scores.py --shard I/N`` into the canonical
+`analysis/outputs/tables/policy_scores.csv` and `.tsv`.
+
+Each shard table is named ``policy_scores.shard-I-of-N.csv``.  The
+merge refuses to run unless the tables given are exactly shards 1 to
+N of the same N, all have the columns of the scorer, and no policy
+appears in two of them.  The rows are written in policy file order,
+so the merged tables are identical to those of a single run over the
+whole corpus.  The merged TSV is then validated by `qa/lint_tables.py`
+with the rules of `qa/score_table_rules.yaml`.
+
+Usage
+-----
+
+    python analysis/scripts/merge_score_shards.py [SHARD_CSV ...] [--no-lint]
+
+Without arguments, every shard table in
+`analysis/outputs/tables/shards/` is merged.  Shard tables produced on
+other machines only need to be copied there (or passed as arguments).
+"""
+
+import argparse
+import csv
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from compute_policy_scores import FIELDNAMES, OUTPUT_CSV, SHARDS_DIR, write_tables
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+LINT_SCRIPT = REPO_ROOT / "qa" / "lint_tables.py"
+SCORE_RULES = REPO_ROOT / "qa" / "score_table_rules.yaml"
+
+SHARD_NAME = re.compile(rf"{re.escape(OUTPUT_CSV.stem)}\.shard-(\d+)-of-(\d+)\.csv")
+
+
+def check_shards(paths: List[Path]) -> None:
+    """Raise ValueError unless `paths` are exactly shards 1 to N of one N."""
+    numbers = []
+    for path in paths:
+        match = SHARD_NAME.fullmatch(path.name)
+        if match is None:
+            raise ValueError(f"{path.name} is not named like a shard table")
+        numbers.append((int(match.group(1)), int(match.group(2))))
+    counts = sorted({count for _, count in numbers})
+    if len(counts) > 1:
+        found = ", ".join(map(str, counts))
+        raise ValueError(f"shard tables of runs with different shard counts ({found})")
+    count = counts[0]
+    shards = {}
+    for (index, _), path in zip(numbers, paths):
+        if index in shards:
+            raise ValueError(f"shard {index} is given twice: {shards[index]} and {path}")
+        shards[index] = path
+    missing = sorted(set(range(1, count + 1)) - set(shards))
+    if missing:
+        raise ValueError(f"missing shard tables: {', '.join(map(str, missing))} of {count}")
+
+
+def read_shards(paths: List[Path]) -> List[dict]:
+    """Return the rows of all shard tables in policy file order.
+
+    Raises ValueError if a table does not have the scorer's columns or
+    a policy appears in more than one table.
+    """
+    rows = []
+    origin = {}
+    for path in paths:
+        with path.open("r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames != FIELDNAMES:
+                raise ValueError(f"{path} does not have the columns of {OUTPUT_CSV.name}")
+            for row in reader:
+                name = row["policy_file"]
+                if name in origin:
+                    raise ValueError(f"{name} is in both {origin[name]} and {path}")
+                origin[name] = path
+                rows.append(row)
+    # compute_policy_scores.py scores the files sorted by path, and
+    # all files are in one directory.
+    rows.sort(key=lambda row: row["policy_file"])
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=f"Merge the --shard tables of compute_policy_scores.py into {OUTPUT_CSV.name}."
+    )
+    parser.add_argument(
+        "shards",
+        nargs="*",
+        type=Path,
+        help=f"Shard CSV tables (default: all in {SHARDS_DIR})",
+    )
+    parser.add_argument(
+        "--no-lint",
+        action="store_true",
+        help="Do not validate the merged table with qa/lint_tables.py",
+    )
+    args = parser.parse_args(argv)
+
+    paths = args.shards or sorted(SHARDS_DIR.glob(f"{OUTPUT_CSV.stem}.shard-*.csv"))
+    if not paths:
+        print(f"No shard tables found in {SHARDS_DIR}. Run compute_policy_scores.py --shard I/N first.")
+        return 1
+    try:
+        check_shards(paths)
+        rows = read_shards(paths)
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}")
+        return 1
+    write_tables(rows, OUTPUT_CSV)
+    print(f"Merged {len(paths)} shards ({len(rows)} policies) into {OUTPUT_CSV}.")
+    if args.no_lint:
+        return 0
+    tsv = OUTPUT_CSV.with_suffix(".tsv")
+    return subprocess.run(
+        [sys.executable, str(LINT_SCRIPT), str(tsv), "--rules", str(SCORE_RULES)]
+    ).returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
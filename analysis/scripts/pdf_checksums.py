@@ -0,0 +1,259 @@
+"""
+pdf_checksums.py
+================
+
+Build and verify the SHA‑256 checksums of the policy PDFs.
+
+Every PDF in `policies/pdf/` is hashed in parallel (a pool of threads;
+`hashlib` releases the GIL while hashing) through a read‑only memory
+map, so a file is hashed in one large call without copying it through
+Python buffers.  The size, modification time and inode of each hashed
+file are kept in a stat cache in `analysis/outputs/.cache/`, and a PDF
+whose stat is unchanged is never rehashed, so a run over an unchanged
+archive only stats the files.
+
+By default the script then
+
+- rewrites `policies/checksums.sha256` (``sha256sum`` format, sorted by
+  file name, header comments kept) so that it lists exactly the PDFs
+  present, and
+- fills in ``checks.checksum_pdf`` in `policies/metadata/<stem>.yml`
+  where it is empty or still the template placeholder.  A recorded
+  checksum that differs from the PDF is reported and only overwritten
+  with ``--update-metadata``.  Metadata files are edited line by line,
+  so comments and field order are kept.
+
+``--verify`` leaves the manifest and metadata untouched and instead reports PDFs whose checksum
+differs from the manifest or their metadata, PDFs missing from the
+manifest and manifest entries without a PDF; it exits non‑zero if
+there are any, which makes it suitable for a commit hook.
+
+Note that `pdf_to_text.py` treats a PDF whose checksum matches the
+manifest as extracted: run it before regenerating the manifest when
+PDFs have changed.
+
+Usage
+-----
+
+    python analysis/scripts/pdf_checksums.py [--verify] [--update-metadata]
+        [--jobs N] [--no-cache]
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pdf_to_text import (
+    CHECKSUMS_FILE,
+    METADATA_DIR,
+    PDF_DIR,
+    atomic_write_text,
+    read_checksums,
+    write_checksums,
+)
+
+# Stat cache of the hashed PDFs.  It lives with the scorer's cache and
+# is ignored by git.
+CACHE_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "analysis"
+    / "outputs"
+    / ".cache"
+    / "pdf_checksums.json"
+)
+
+# The checksum_pdf line of a metadata file, e.g. "  checksum_pdf: <sha256>".
+CHECKSUM_LINE = re.compile(r"^(\s+checksum_pdf:)[ \t]*(.*?)[ \t]*$", re.MULTILINE)
+
+SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+
+class Stat(NamedTuple):
+    """The stat fields that decide whether a file must be rehashed."""
+
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+def file_stat(path: Path) -> Stat:
+    """Return the Stat of a file."""
+    st = path.stat()
+    return Stat(st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def sha256_mmap(path: Path) -> str:
+    """Return the SHA‑256 hex digest of a file, read through a memory map."""
+    sha = hashlib.sha256()
+    with path.open("rb") as f:
+        # Empty files cannot be mapped.
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    sha.update(view)
+    return sha.hexdigest()
+
+
+def load_stat_cache(path: Path) -> Dict[str, list]:
+    """Read the stat cache: {file name: [size, mtime_ns, inode, checksum]}."""
+    if not path.is_file():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as exc:
+        print(f"Warning: ignoring unreadable cache {path}: {exc}")
+        return {}
+
+
+def save_stat_cache(path: Path, entries: Dict[str, list]) -> None:
+    """Write the stat cache atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, json.dumps(entries, sort_keys=True))
+
+
+def hash_pdfs(
+    pdf_paths: List[Path], cache: Dict[str, list], jobs: int
+) -> Tuple[Dict[str, str], int]:
+    """Return {file name: checksum} and the number of files actually hashed.
+
+    Only files whose stat differs from `cache` are hashed.  `cache` is
+    updated in place and pruned to the given files.
+    """
+    checksums: Dict[str, str] = {}
+    stale = []
+    stats = {}
+    for path in pdf_paths:
+        stat = file_stat(path)
+        stats[path.name] = stat
+        entry = cache.get(path.name)
+        if entry is not None and Stat(*entry[:3]) == stat:
+            checksums[path.name] = entry[3]
+        else:
+            stale.append(path)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        for path, checksum in zip(stale, pool.map(sha256_mmap, stale)):
+            checksums[path.name] = checksum
+    cache.clear()
+    cache.update(
+        {name: list(stats[name]) + [checksum] for name, checksum in checksums.items()}
+    )
+    return {name: checksums[name] for name in sorted(checksums)}, len(stale)
+
+
+def read_metadata_checksum(meta_path: Path) -> Optional[str]:
+    """Return the raw ``checksum_pdf`` value of a metadata file, or None if absent."""
+    match = CHECKSUM_LINE.search(meta_path.read_text(encoding="utf-8"))
+    if match is None:
+        return None
+    return match.group(2).strip("'\"").lower()
+
+
+def set_metadata_checksum(meta_path: Path, checksum: str) -> None:
+    """Replace the ``checksum_pdf`` value of a metadata file in place."""
+    text = meta_path.read_text(encoding="utf-8")
+    text = CHECKSUM_LINE.sub(lambda m: f"{m.group(1)} {checksum}", text, count=1)
+    atomic_write_text(meta_path, text)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Regenerate or verify the checksums of the policy PDFs."
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Only check the manifest and metadata against the PDFs",
+    )
+    parser.add_argument(
+        "--update-metadata",
+        action="store_true",
+        help="Overwrite metadata checksums that differ from the PDF",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of hashing threads (default: 0, all CPUs)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Rehash every PDF, ignoring the stat cache",
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    pdf_paths = sorted(PDF_DIR.glob("*.pdf"))
+    cache = {} if args.no_cache else load_stat_cache(CACHE_PATH)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    checksums, hashed = hash_pdfs(pdf_paths, cache, jobs)
+    save_stat_cache(CACHE_PATH, cache)
+    elapsed = time.perf_counter() - start
+
+    problems = 0
+    recorded = read_checksums()
+    if args.verify:
+        for name, checksum in checksums.items():
+            if name not in recorded:
+                print(f"Unlisted {name}: not in {CHECKSUMS_FILE.name}")
+                problems += 1
+            elif recorded[name] != checksum:
+                print(f"Changed {name}: manifest {recorded[name]}, file {checksum}")
+                problems += 1
+        for name in sorted(set(recorded) - set(checksums)):
+            print(f"Missing {name}: listed in {CHECKSUMS_FILE.name} but not in {PDF_DIR.name}/")
+            problems += 1
+    elif checksums != recorded:
+        for name, checksum in checksums.items():
+            if recorded.get(name, checksum) != checksum:
+                print(f"Changed {name}: {recorded[name]} -> {checksum}")
+        write_checksums(checksums)
+        print(f"Wrote {CHECKSUMS_FILE} ({len(checksums)} PDFs)")
+
+    filled = 0
+    for meta_path in sorted(METADATA_DIR.glob("*.yml")):
+        checksum = checksums.get(f"{meta_path.stem}.pdf")
+        if checksum is None:
+            continue
+        value = read_metadata_checksum(meta_path)
+        if value is None:
+            print(f"No checks.checksum_pdf field in {meta_path.name}")
+            continue
+        if value == checksum:
+            continue
+        if not SHA256_HEX.fullmatch(value):
+            # Empty or the template placeholder.
+            if args.verify:
+                print(f"Unrecorded {meta_path.name}: checksum_pdf is not set")
+                problems += 1
+            else:
+                set_metadata_checksum(meta_path, checksum)
+                filled += 1
+        elif args.update_metadata and not args.verify:
+            print(f"Updated {meta_path.name}: {value} -> {checksum}")
+            set_metadata_checksum(meta_path, checksum)
+            filled += 1
+        else:
+            print(f"Mismatch {meta_path.name}: metadata {value}, file {checksum}")
+            problems += 1
+
+    if filled:
+        print(f"Updated checksum_pdf in {filled} metadata file(s).")
+    print(
+        f"{len(checksums)} PDFs ({hashed} hashed, {len(checksums) - hashed} unchanged) "
+        f"in {elapsed:.2f} s; {problems} problem(s)."
+    )
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+pdf_to_text.py
+==============
+
+Extract plain text from the policy PDFs in `policies/pdf/` into
+`policies/text/`, the input of `compute_policy_scores.py`.
+
+Text is extracted with the pure‑Python `pypdf` library
+(``pip install pypdf``), so no system tools are needed.  As with
+pdftotext, every page is terminated by a form feed (``\\f``) so that
+page numbers can be recovered from the text.
+
+A PDF is only (re‑)extracted when its text file is missing or when
+the PDF has changed, i.e. its SHA‑256 matches neither the checksum
+recorded in `policies/checksums.sha256` nor the one in the
+``checks.checksum_pdf`` field of its metadata file.  Neither source
+wins: either may be the more recent (`pdf_checksums.py` updates the
+metadata, this script the manifest), so a match with either means the
+text is up to date, and a manifest entry that is stale but contradicted
+by a matching metadata checksum is corrected.  Existing texts without
+any recorded checksum are left alone because many were checked by
+hand; use ``--force`` to re‑extract them.  After a successful
+extraction the PDF's checksum is recorded in `checksums.sha256` so the
+next run skips it.  PDFs are hashed and extracted in parallel across a pool of
+worker processes, and each text file is written atomically (to a
+temporary file that is then renamed), so an interrupted run never
+leaves a truncated text behind.
+
+PDFs whose names do not follow `docs/naming_conventions.md` (e.g.
+``DE_RPO_21_University Muenster 2012.pdf``) are legacy copies.  They
+are skipped when a correctly named PDF with the same policy ID
+exists; otherwise their text goes to the single existing text file
+with that policy ID, or to ``<pdf stem>.txt`` if there is none.
+
+Usage
+-----
+
+    python analysis/scripts/pdf_to_text.py [PDF ...] [--jobs N] [--force]
+        [--dry-run]
+
+Without arguments every PDF in `policies/pdf/` is considered.
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+from policy_metadata import policy_id_prefix
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional dependency, checked in main()
+    PdfReader = None
+
+
+POLICIES_ROOT = Path(__file__).resolve().parents[2] / "policies"
+PDF_DIR = POLICIES_ROOT / "pdf"
+TEXT_DIR = POLICIES_ROOT / "text"
+METADATA_DIR = POLICIES_ROOT / "metadata"
+CHECKSUMS_FILE = POLICIES_ROOT / "checksums.sha256"
+
+# File stems following docs/naming_conventions.md, e.g.
+# DE_RPO_08A_FAU-Erlangen-Nuernberg_2014 or DE_RPO_13_University-of-Bonn_2024_de.
+CONVENTIONAL_STEM = re.compile(
+    r"^[A-Z]{2}_(RPO|RFO)_\d+[A-Z]?_[^\s_()]+_\d{4}(_[a-z]{2})?$"
+)
+
+# Read PDFs in blocks of this size when hashing.
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def sha256_file(path: Path) -> str:
+    """Return the SHA‑256 hex digest of a file."""
+    sha = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def read_checksums(path: Path = CHECKSUMS_FILE) -> Dict[str, str]:
+    """Read a ``sha256sum``‑style manifest into {file name: checksum}."""
+    checksums: Dict[str, str] = {}
+    if not path.is_file():
+        return checksums
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            digest, _, name = line.partition(" ")
+            # sha256sum writes "<digest>  <name>" or "<digest> *<name>".
+            name = name[1:] if name[:1] in (" ", "*") else name
+            checksums[name] = digest.lower()
+    return checksums
+
+
+def write_checksums(checksums: Dict[str, str], path: Path = CHECKSUMS_FILE) -> None:
+    """Rewrite the manifest atomically, keeping its header comments."""
+    header = ["# SHA256 checksums for policy files\n"]
+    if path.is_file():
+        with path.open("r", encoding="utf-8") as f:
+            comments = [
+                line for line in f if line.startswith("#") and "<placeholder>" not in line
+            ]
+        header = comments or header
+    lines = [f"{checksums[name]}  {name}\n" for name in sorted(checksums)]
+    atomic_write_text(path, "".join(header + lines))
+
+
+def metadata_checksum(stem: str) -> Optional[str]:
+    """Return ``checks.checksum_pdf`` from the policy's metadata, if recorded."""
+    meta_path = METADATA_DIR / f"{stem}.yml"
+    if not meta_path.is_file():
+        return None
+    with meta_path.open("r", encoding="utf-8") as f:
+        meta = yaml.safe_load(f) or {}
+    value = str((meta.get("checks") or {}).get("checksum_pdf") or "").strip().lower()
+    return value if re.fullmatch(r"[0-9a-f]{64}", value) else None
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write `text` to `path` via a temporary file in the same directory."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def text_path_for(pdf_path: Path, pdf_stems: List[str]) -> Tuple[Optional[Path], str]:
+    """Return the text file a PDF should be extracted to.
+
+    If the PDF should be skipped, the path is None and the second
+    element says why.  See the module docstring for how legacy PDF
+    names are mapped.
+    """
+    stem = pdf_path.stem
+    if CONVENTIONAL_STEM.match(stem):
+        return TEXT_DIR / f"{stem}.txt", ""
+    prefix = policy_id_prefix(stem)
+    if any(
+        CONVENTIONAL_STEM.match(other) and policy_id_prefix(other) == prefix
+        for other in pdf_stems
+    ):
+        return None, "legacy copy of a correctly named PDF"
+    existing = sorted(TEXT_DIR.glob(f"{prefix}_*.txt"))
+    if len(existing) == 1:
+        return existing[0], ""
+    if not existing:
+        return TEXT_DIR / f"{stem}.txt", ""
+    return None, f"legacy name matches {len(existing)} text files with ID {prefix}"
+
+
+class Task(NamedTuple):
+    """One PDF to consider for extraction."""
+
+    pdf_path: Path
+    text_path: Path
+    manifest: Optional[str]  # checksum recorded in checksums.sha256
+    metadata: Optional[str]  # checksum recorded in the metadata file
+    force: bool
+    dry_run: bool
+
+
+class Outcome(NamedTuple):
+    """Result of processing one Task."""
+
+    pdf_name: str
+    status: str  # "extracted", "skipped" or "failed"
+    message: str
+    checksum: Optional[str] = None  # to record in the manifest
+
+
+def extract_text(pdf_path: Path) -> str:
+    """Return the text of a PDF with a form feed after every page."""
+    # pypdf logs a warning for every font it cannot fully decode.
+    logging.getLogger("pypdf").setLevel(logging.ERROR)
+    reader = PdfReader(str(pdf_path))
+    return "".join((page.extract_text() or "") + "\f" for page in reader.pages)
+
+
+def process_task(task: Task) -> Outcome:
+    """Hash one PDF and extract it if its text is missing or out of date."""
+    name = task.pdf_path.name
+    try:
+        checksum = sha256_file(task.pdf_path)
+        if not task.force and task.text_path.is_file():
+            if task.manifest is None and task.metadata is None:
+                return Outcome(name, "skipped", "text exists, no checksum recorded")
+            if checksum == task.manifest:
+                return Outcome(name, "skipped", "unchanged")
+            if checksum == task.metadata:
+                # Record it in the manifest too, replacing a stale entry.
+                return Outcome(
+                    name, "skipped", "unchanged (matches metadata checksum)", checksum
+                )
+        if task.dry_run:
+            return Outcome(name, "extracted", f"would write {task.text_path.name}")
+        atomic_write_text(task.text_path, extract_text(task.pdf_path))
+    except Exception as exc:
+        return Outcome(name, "failed", str(exc))
+    return Outcome(name, "extracted", f"-> {task.text_path.name}", checksum)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Extract policy PDFs to plain text incrementally and in parallel."
+    )
+    parser.add_argument(
+        "pdfs",
+        nargs="*",
+        type=Path,
+        help="PDF files to extract (default: all PDFs in policies/pdf)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of worker processes (default: 0, all CPUs)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-extract PDFs even if their text is up to date",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be extracted without writing anything",
+    )
+    args = parser.parse_args(argv)
+    if PdfReader is None and not args.dry_run:
+        print("pdf_to_text.py requires pypdf: pip install pypdf")
+        return 1
+
+    all_stems = [p.stem for p in PDF_DIR.glob("*.pdf")]
+    pdf_paths = sorted(args.pdfs) if args.pdfs else sorted(PDF_DIR.glob("*.pdf"))
+    checksums = read_checksums()
+    tasks = []
+    for pdf_path in pdf_paths:
+        text_path, reason = text_path_for(pdf_path, all_stems)
+        if text_path is None:
+            print(f"Skipped {pdf_path.name}: {reason}")
+            continue
+        tasks.append(
+            Task(
+                pdf_path,
+                text_path,
+                checksums.get(pdf_path.name),
+                metadata_checksum(pdf_path.stem),
+                args.force,
+                args.dry_run,
+            )
+        )
+
+    TEXT_DIR.mkdir(parents=True, exist_ok=True)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    counts = {"extracted": 0, "skipped": 0, "failed": 0}
+    updated = False
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        for outcome in pool.map(process_task, tasks, chunksize=chunksize):
+            counts[outcome.status] += 1
+            print(f"{outcome.status.capitalize()} {outcome.pdf_name}: {outcome.message}")
+            if outcome.checksum not in (None, checksums.get(outcome.pdf_name)):
+                checksums[outcome.pdf_name] = outcome.checksum
+                updated = True
+
+    if updated and not args.dry_run:
+        write_checksums(checksums)
+    print(
+        f"{counts['extracted']} extracted, {counts['skipped']} skipped, "
+        f"{counts['failed']} failed."
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+policy_index.py
+===============
+
+Persistent full‑text index of `policies/text/` for trying out
+detection rules interactively.
+
+The index is a SQLite database with an FTS5 table holding every
+policy text, tokenised into trigrams (a positional inverted index
+that supports substring search).  It lives next to the
+scorer's result cache in `analysis/outputs/.cache/` and is updated
+incrementally: a policy is only re‑indexed when its size or
+modification time has changed *and* the SHA‑256 of its text differs
+from the one recorded; removed policies are dropped.
+
+The index holds the normalised texts (see text_normalisation.py),
+which are what the scorer's rules are matched against.
+
+A query takes a rule in the same form as the entries of
+``compute_policy_scores.RULES`` (a regular expression, or a
+proximity rule made of two expressions) and returns every policy it
+matches, with character offsets in the original text.  The literal prefix of each
+expression (e.g. ``verpflichtet`` for ``\\bverpflichtet\\b``), which
+every match must contain, is looked up in the index as a substring,
+so only the candidate policies are scanned with the actual rule and
+the result is exactly what the scorer would find.  Rules whose
+prefixes are shorter than three characters (a top‑level alternation
+has none) are checked against every indexed text, which is still
+much faster than rereading the corpus.
+
+Usage
+-----
+
+    python analysis/scripts/policy_index.py update
+    python analysis/scripts/policy_index.py query PATTERN
+        [--near PATTERN [--within N] [--unordered]] [--literal]
+        [--offsets K] [--no-update]
+
+Examples:
+
+    python analysis/scripts/policy_index.py query "\\bverpflichtet\\b"
+    python analysis/scripts/policy_index.py query "urheberrecht" \\
+        --near "übertragen" --within 8
+
+Patterns are matched against the normalised, lower‑cased text, as in
+the scorer, with their umlauts folded.
+``query`` brings the index up to date first unless ``--no-update`` is
+given.  `compute_policy_scores.py --index` uses the same index to skip
+rules that cannot match a policy.
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from compute_policy_scores import (
+    CACHE_PATH,
+    POLICIES_DIR,
+    Near,
+    Rule,
+    RuleScanner,
+    literal_prefix,
+    text_digest,
+)
+from text_normalisation import cached_normalise, fold, lower_text
+
+INDEX_PATH = CACHE_PATH.with_name("policy_index.sqlite")
+
+# Stored as PRAGMA user_version; an index built with another schema is
+# rebuilt from scratch.
+SCHEMA_VERSION = 2
+
+# The trigram tokenizer cannot look up shorter strings.
+MIN_PREFIX = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    policy_file TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    policy_file UNINDEXED,
+    body,
+    tokenize = 'trigram'
+);
+"""
+
+
+def fts_query(rule: Rule) -> Optional[str]:
+    """Return an FTS5 query matching a superset of the policies `rule` matches.
+
+    The query asks for the literal prefix of the rule's (folded)
+    expression(s) as a substring.  Returns None if no prefix is long enough, in
+    which case every policy is a candidate.
+    """
+    # Near is checked structurally: when the scorer runs as a script,
+    # its rules come from __main__ rather than this module's import.
+    patterns = [rule] if isinstance(rule, str) else [rule.first, rule.second]
+    terms = []
+    for pattern in patterns:
+        prefix = literal_prefix(fold(pattern))
+        if len(prefix) >= MIN_PREFIX:
+            terms.append('"' + prefix.replace('"', '""') + '"')
+    return " AND ".join(terms) if terms else None
+
+
+class QueryResult(NamedTuple):
+    """Matches of a rule in one policy."""
+
+    policy_file: str
+    spans: List[Tuple[int, int]]
+
+
+class PolicyIndex:
+    """SQLite FTS5 index of the policy texts (see the module docstring)."""
+
+    def __init__(self, path: Path = INDEX_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS documents; DROP TABLE IF EXISTS passages;"
+            )
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self) -> "PolicyIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def update(self, file_paths: Iterable[Path]) -> Dict[str, int]:
+        """Bring the index in line with `file_paths`; return counts per action."""
+        known = {
+            name: (digest, size, mtime_ns)
+            for name, digest, size, mtime_ns in self.conn.execute(
+                "SELECT policy_file, digest, size, mtime_ns FROM documents"
+            )
+        }
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        with self.conn:
+            for file_path in file_paths:
+                name = file_path.name
+                seen.add(name)
+                stat = file_path.stat()
+                entry = known.get(name)
+                if entry and entry[1:] == (stat.st_size, stat.st_mtime_ns):
+                    counts["unchanged"] += 1
+                    continue
+                content = file_path.read_text(encoding="utf-8", errors="ignore")
+                digest = text_digest(content)
+                if entry and entry[0] == digest:
+                    counts["unchanged"] += 1
+                else:
+                    self.conn.execute("DELETE FROM passages WHERE policy_file = ?", (name,))
+                    self.conn.execute(
+                        "INSERT INTO passages (policy_file, body) VALUES (?, ?)",
+                        (name, cached_normalise(content, digest).text),
+                    )
+                    counts["updated" if entry else "added"] += 1
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                    (name, digest, stat.st_size, stat.st_mtime_ns),
+                )
+            for name in set(known) - seen:
+                self.conn.execute("DELETE FROM passages WHERE policy_file = ?", (name,))
+                self.conn.execute("DELETE FROM documents WHERE policy_file = ?", (name,))
+                counts["removed"] += 1
+        return counts
+
+    def candidates(self, rule: Rule) -> Optional[List[str]]:
+        """Return the policies that may match `rule`, or None for all of them."""
+        query = fts_query(rule)
+        if query is None:
+            return None
+        return [
+            name
+            for (name,) in self.conn.execute(
+                "SELECT policy_file FROM passages WHERE passages MATCH ?", (query,)
+            )
+        ]
+
+    def query(
+        self, rule: Rule, texts_dir: Path = POLICIES_DIR
+    ) -> Tuple[List[QueryResult], int]:
+        """Return the policies `rule` matches and the number of candidates checked.
+
+        Spans are mapped back to the policy files in `texts_dir`.
+        """
+        scanner = RuleScanner({"query": {"rule": [rule]}})
+        query = fts_query(rule)
+        if query is None:
+            rows = self.conn.execute("SELECT policy_file, body FROM passages")
+        else:
+            rows = self.conn.execute(
+                "SELECT policy_file, body FROM passages WHERE passages MATCH ?", (query,)
+            )
+        results = []
+        checked = 0
+        for name, body in rows:
+            checked += 1
+            spans = list(scanner.iter_matches(0, lower_text(body)))
+            if spans:
+                content = (texts_dir / name).read_text(encoding="utf-8", errors="ignore")
+                offsets = cached_normalise(content, text_digest(content)).offsets
+                spans = [(offsets[s], offsets[e - 1] + 1) for s, e in spans]
+                results.append(QueryResult(name, spans))
+        results.sort()
+        return results, checked
+
+    def pattern_skips(
+        self, patterns: List[Rule], policy_files: List[str]
+    ) -> Dict[str, FrozenSet[int]]:
+        """Return, per policy, the indices of `patterns` that cannot match it."""
+        skips: Dict[str, set] = {name: set() for name in policy_files}
+        for index, pattern in enumerate(patterns):
+            candidates = self.candidates(pattern)
+            if candidates is None:
+                continue
+            candidates = set(candidates)
+            for name, skip in skips.items():
+                if name not in candidates:
+                    skip.add(index)
+        return {name: frozenset(skip) for name, skip in skips.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Index the policy texts and query candidate rules against them."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("update", help="Index new and changed policy texts")
+    query = sub.add_parser("query", help="List the policies a rule matches")
+    query.add_argument("pattern", help="Regular expression (matched on lower-cased text)")
+    query.add_argument("--near", metavar="PATTERN", help="Second term of a proximity rule")
+    query.add_argument(
+        "--within", type=int, default=20, help="Maximum distance in words (default: 20)"
+    )
+    query.add_argument(
+        "--unordered", action="store_true", help="Accept the terms in either order"
+    )
+    query.add_argument(
+        "--literal", action="store_true", help="Treat the pattern(s) as plain phrases"
+    )
+    query.add_argument(
+        "--offsets", type=int, default=5, help="Offsets shown per policy (default: 5)"
+    )
+    query.add_argument(
+        "--no-update", action="store_true", help="Query the index as it is"
+    )
+    args = parser.parse_args(argv)
+
+    file_paths = sorted(POLICIES_DIR.glob("*.txt"))
+    with PolicyIndex() as index:
+        if args.command == "update" or not args.no_update:
+            counts = index.update(file_paths)
+            if args.command == "update":
+                print(", ".join(f"{n} {action}" for action, n in counts.items()))
+                return 0
+
+        first = args.pattern.lower()
+        second = None if args.near is None else args.near.lower()
+        if args.literal:
+            first = re.escape(first)
+            second = None if second is None else re.escape(second)
+        try:
+            rule: Rule = (
+                first
+                if second is None
+                else Near(first, second, within=args.within, ordered=not args.unordered)
+            )
+            start = time.perf_counter()
+            results, checked = index.query(rule)
+            elapsed = (time.perf_counter() - start) * 1000
+        except re.error as exc:
+            print(f"Invalid pattern: {exc}")
+            return 1
+
+    for result in results:
+        shown = ", ".join(f"{s}-{e}" for s, e in result.spans[: args.offsets])
+        more = len(result.spans) - args.offsets
+        print(
+            f"{result.policy_file}: {len(result.spans)} match(es) at {shown}"
+            + (f" (+{more} more)" if more > 0 else "")
+        )
+    print(
+        f"{len(results)} of {len(file_paths)} policies matched "
+        f"({checked} candidates checked) in {elapsed:.1f} ms."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
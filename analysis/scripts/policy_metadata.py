@@ -0,0 +1,129 @@
+"""
+policy_metadata.py
+==================
+
+Bulk loader for the policy metadata in `policies/metadata/*.yml`.
+
+All metadata files are read in one call.  Parsing uses PyYAML's
+libyaml‑based ``CSafeLoader`` when PyYAML was built with it and the
+pure‑Python ``SafeLoader`` otherwise, and the fields in
+``METADATA_FIELDS`` of every file are cached in
+`analysis/outputs/.cache/` together with the file's size and
+modification time, so only new or edited files are parsed again.
+
+Metadata files are named after the policy (``<stem>.yml``, see
+`docs/naming_conventions.md`).  `metadata_for` matches them to policy
+text files by stem and, failing that, by the ``COUNTRY_SECTOR_ID``
+prefix when exactly one metadata file has it.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+
+METADATA_DIR = Path(__file__).resolve().parents[2] / "policies" / "metadata"
+
+CACHE_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "analysis"
+    / "outputs"
+    / ".cache"
+    / "policy_metadata.json"
+)
+
+# Fields kept from each metadata file.
+METADATA_FIELDS = ("policy_id", "institution", "title", "year", "language", "document_type")
+
+
+def policy_id_prefix(stem: str) -> str:
+    """Return the ``COUNTRY_SECTOR_ID`` part of a policy file stem."""
+    return "_".join(stem.split("_")[:3])
+
+
+def parse_metadata(path: Path) -> Dict[str, str]:
+    """Parse one metadata file and return its METADATA_FIELDS as strings.
+
+    Missing or empty fields are returned as empty strings.
+    """
+    with path.open("r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=SafeLoader) or {}
+    return {
+        field: "" if data.get(field) is None else str(data[field]).strip()
+        for field in METADATA_FIELDS
+    }
+
+
+def load_metadata(
+    directory: Path = METADATA_DIR, cache_path: Optional[Path] = CACHE_PATH
+) -> Dict[str, Dict[str, str]]:
+    """Return {file stem: fields} for every metadata file in `directory`.
+
+    Files whose size and modification time match the cache are not
+    parsed again; with ``cache_path=None`` every file is parsed.
+    Unreadable files are reported and left out.
+    """
+    cached: Dict[str, list] = {}
+    if cache_path is not None and cache_path.is_file():
+        try:
+            with cache_path.open("r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+    entries: Dict[str, list] = {}
+    metadata: Dict[str, Dict[str, str]] = {}
+    if directory.is_dir():
+        with os.scandir(directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith(".yml") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                signature = [stat.st_size, stat.st_mtime_ns]
+                hit = cached.get(entry.name)
+                if hit is not None and hit[:2] == signature and set(hit[2]) == set(METADATA_FIELDS):
+                    fields = hit[2]
+                else:
+                    try:
+                        fields = parse_metadata(Path(entry.path))
+                    except (OSError, yaml.YAMLError) as exc:
+                        print(f"Warning: could not read metadata {entry.name}: {exc}")
+                        continue
+                entries[entry.name] = signature + [fields]
+                metadata[entry.name[: -len(".yml")]] = fields
+    if cache_path is not None and entries != cached:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return metadata
+
+
+def metadata_for(
+    file_names: Iterable[str], metadata: Dict[str, Dict[str, str]]
+) -> Dict[str, Dict[str, str]]:
+    """Match policy text files to their metadata; return {file name: fields}.
+
+    Files without matching metadata are left out.
+    """
+    by_prefix: Dict[str, list] = {}
+    for stem in metadata:
+        by_prefix.setdefault(policy_id_prefix(stem), []).append(stem)
+    matched = {}
+    for name in file_names:
+        stem = Path(name).stem
+        if stem in metadata:
+            matched[name] = metadata[stem]
+            continue
+        candidates = by_prefix.get(policy_id_prefix(stem), [])
+        if len(candidates) == 1:
+            matched[name] = metadata[candidates[0]]
+    return matched
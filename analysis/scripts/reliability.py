@@ -0,0 +1,535 @@
+"""
+reliability.py
+==============
+
+Inter‑coder reliability of the C1–C8 codings, as required by
+`methods/reliability_protocol.md`.
+
+Human codings are read from `snippets/by_policy/<policy_id>/codings.csv`,
+next to the snippets they are based on: one row per coder with the
+columns ``coder`` and ``C1`` … ``C8``, holding the raw condition values
+of `CONDITION_BOUNDS` (a blank cell means not coded).  The heuristic
+values that `compute_policy_scores.py` wrote to `policy_scores.csv`
+join them as the coder ``heuristic``, for the policies that humans
+coded.  All codings are loaded into one NumPy array
+(coders × policies × conditions).
+
+The script reports, per condition and pooled over all conditions
+(``all``):
+
+- Cohen's kappa for every pair of coders;
+- Krippendorff's alpha over the human coders and, when the heuristic
+  takes part, over all coders.  ``--level interval`` uses squared
+  differences of the values normalised to [0, 1] with
+  `CONDITION_BOUNDS` instead of nominal (exact) agreement.
+
+The pooled statistics compare the observed agreement over all
+conditions with the agreement expected by chance within each
+condition, since the values of two conditions are never compared.
+
+Both statistics only depend on a contingency or coincidence table,
+which is a sum of per‑policy contributions.  Confidence intervals are
+therefore bootstrapped by resampling policies as a matrix of policy
+counts (replicates × policies): the tables of a whole batch of
+replicates are one matrix product with the stacked per‑policy
+contributions, and every statistic is computed from them as array
+operations.  10,000 replicates over thousands of policies take a few
+seconds.  Intervals are percentile intervals; replicates where a
+statistic is undefined (no variation) are left out.  Results are
+written to `analysis/outputs/tables/reliability.csv`.
+
+Usage
+-----
+
+    python analysis/scripts/reliability.py [--replicates N] [--confidence C]
+        [--level {nominal,interval}] [--seed S] [--scores CSV] [--no-heuristic]
+
+Run `compute_policy_scores.py` first so that the score table exists.
+Requires NumPy.
+"""
+
+import argparse
+import csv
+import sys
+from itertools import combinations, permutations
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from compute_policy_scores import CONDITION_BOUNDS, OUTPUT_CSV, SNIPPETS_DIR
+
+CONDITIONS = list(CONDITION_BOUNDS)
+
+# Human codings, one file per policy directory in SNIPPETS_DIR.
+CODINGS_NAME = "codings.csv"
+
+# Coder name of the values in the score table.
+HEURISTIC = "heuristic"
+
+OUTPUT_RELIABILITY = OUTPUT_CSV.with_name("reliability.csv")
+
+# Number of bootstrap replicates per matrix product.  Bounds memory to
+# about policies × BATCH_SIZE floats.
+BATCH_SIZE = 1000
+
+# {coder: {policy ID: {condition: raw value}}}
+Codings = Dict[str, Dict[str, Dict[str, float]]]
+
+
+def parse_value(cell: str, cond: str) -> Optional[float]:
+    """Return the raw value in a coding cell, or None if it is blank.
+
+    Raises ValueError for a value that is not a number within the
+    condition's bounds.
+    """
+    cell = cell.strip()
+    if not cell:
+        return None
+    value = float(cell)
+    lower, upper = CONDITION_BOUNDS[cond]
+    if not lower <= value <= upper:
+        raise ValueError(f"{cond} must be between {lower} and {upper}, got {cell}")
+    return value
+
+
+def load_human_codings(directory: Path = SNIPPETS_DIR) -> Codings:
+    """Read every ``codings.csv`` below `directory`.
+
+    Invalid cells are reported and treated as not coded.
+    """
+    codings: Codings = {}
+    for path in sorted(directory.glob(f"*/{CODINGS_NAME}")):
+        policy_id = path.parent.name
+        with path.open("r", newline="", encoding="utf-8") as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                coder = (row.get("coder") or "").strip()
+                if not coder:
+                    print(f"Warning: {path}:{line}: no coder given")
+                    continue
+                values = {}
+                for cond in CONDITIONS:
+                    try:
+                        value = parse_value(row.get(cond) or "", cond)
+                    except ValueError as exc:
+                        print(f"Warning: {path}:{line}: {exc}")
+                        continue
+                    if value is not None:
+                        values[cond] = value
+                codings.setdefault(coder, {})[policy_id] = values
+    return codings
+
+
+def load_heuristic_codings(path: Path) -> Dict[str, Dict[str, float]]:
+    """Return {policy ID: raw values} from a `compute_policy_scores.py` table."""
+    values = {}
+    with path.open("r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            values[Path(row["policy_file"]).stem] = {
+                cond: float(row[cond]) for cond in CONDITIONS
+            }
+    return values
+
+
+def coding_array(codings: Codings, coders: List[str], policies: List[str]) -> np.ndarray:
+    """Return the (coders × policies × conditions) raw values; NaN where not coded."""
+    values = np.full((len(coders), len(policies), len(CONDITIONS)), np.nan)
+    for i, coder in enumerate(coders):
+        coded = codings[coder]
+        for j, policy in enumerate(policies):
+            for k, cond in enumerate(CONDITIONS):
+                value = coded.get(policy, {}).get(cond)
+                if value is not None:
+                    values[i, j, k] = value
+    return values
+
+
+class Categories(NamedTuple):
+    """The coded values as category indices, per condition."""
+
+    codes: np.ndarray          # (coders × policies × conditions), -1 where not coded
+    values: List[np.ndarray]   # the sorted distinct values of each condition
+
+
+def categorise(values: np.ndarray) -> Categories:
+    """Turn raw values into category indices per condition."""
+    codes = np.full(values.shape, -1, dtype=np.int64)
+    categories = []
+    for k in range(len(CONDITIONS)):
+        column = values[:, :, k]
+        coded = ~np.isnan(column)
+        distinct = np.unique(column[coded])
+        codes[:, :, k][coded] = np.searchsorted(distinct, column[coded])
+        categories.append(distinct)
+    return Categories(codes, categories)
+
+
+###############################################################################
+# Per‑policy table contributions
+###############################################################################
+
+# A statistic is computed from one K × K table per condition (K the
+# number of categories of the condition), flattened and concatenated.
+# The contribution of every policy is one row of such a matrix, so the
+# tables of a bootstrap replicate are the policy counts of the
+# replicate times the matrix.
+
+def table_offsets(categories: Categories) -> np.ndarray:
+    """Return where the flattened table of each condition starts (plus the end)."""
+    sizes = [len(values) ** 2 for values in categories.values]
+    return np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+
+
+def contingency_contributions(categories: Categories, a: int, b: int) -> np.ndarray:
+    """Return the per‑policy contingency tables of coders `a` and `b` (Cohen's kappa)."""
+    codes = categories.codes
+    offsets = table_offsets(categories)
+    n_policies = codes.shape[1]
+    contributions = np.zeros((n_policies, offsets[-1]))
+    for k, values in enumerate(categories.values):
+        first, second = codes[a, :, k], codes[b, :, k]
+        both = (first >= 0) & (second >= 0)
+        cells = offsets[k] + first[both] * len(values) + second[both]
+        contributions[np.flatnonzero(both), cells] += 1.0
+    return contributions
+
+
+def coincidence_contributions(categories: Categories, coders: Sequence[int]) -> np.ndarray:
+    """Return the per‑policy coincidence tables of `coders` (Krippendorff's alpha).
+
+    Every ordered pair of values that two different coders gave a unit
+    counts 1 / (m − 1), where m is the number of coders of the unit;
+    units with a single coder count nothing.
+    """
+    codes = categories.codes
+    offsets = table_offsets(categories)
+    n_policies = codes.shape[1]
+    contributions = np.zeros((n_policies, offsets[-1]))
+    for k, values in enumerate(categories.values):
+        coded = codes[list(coders), :, k] >= 0
+        pairable = coded.sum(axis=0)
+        weight = np.divide(
+            1.0, pairable - 1, out=np.zeros(n_policies), where=pairable > 1
+        )
+        for a, b in permutations(coders, 2):
+            first, second = codes[a, :, k], codes[b, :, k]
+            both = (first >= 0) & (second >= 0)
+            cells = offsets[k] + first[both] * len(values) + second[both]
+            np.add.at(contributions, (np.flatnonzero(both), cells), weight[both])
+    return contributions
+
+
+###############################################################################
+# Statistics from tables
+###############################################################################
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Elementwise numerator / denominator, NaN where the denominator is 0."""
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.full(np.broadcast(numerator, denominator).shape, np.nan),
+        where=denominator != 0,
+    )
+
+
+def _blocks(tables: np.ndarray, categories: Categories) -> Iterator[np.ndarray]:
+    """Yield the (replicates × K × K) tables of each condition."""
+    offsets = table_offsets(categories)
+    for k, values in enumerate(categories.values):
+        size = len(values)
+        yield tables[:, offsets[k] : offsets[k + 1]].reshape(len(tables), size, size)
+
+
+def cohen_kappa(tables: np.ndarray, categories: Categories) -> np.ndarray:
+    """Return Cohen's kappa per condition and pooled, (replicates × conditions + 1).
+
+    `tables` holds contingency tables (see `contingency_contributions`)
+    for each replicate.  The pooled kappa takes the observed agreement
+    over all conditions and the chance agreement within each condition,
+    weighted by its number of units: p_e = Σ_k (n_k / N) p_e,k.
+    """
+    agreed = []
+    expected = []
+    totals = []
+    for block in _blocks(tables, categories):
+        n = block.sum(axis=(1, 2))
+        agreed.append(np.trace(block, axis1=1, axis2=2))
+        expected.append((block.sum(axis=2) * block.sum(axis=1)).sum(axis=1))
+        totals.append(n)
+    agreed_, expected_, n_ = (np.stack(x, axis=1) for x in (agreed, expected, totals))
+    # kappa = (p_o - p_e) / (1 - p_e) with p_o = agreed / n, p_e = expected / n².
+    per_condition = _ratio(n_ * agreed_ - expected_, n_ ** 2 - expected_)
+    total = n_.sum(axis=1)
+    # Σ_k (n_k / N) · expected_k / n_k², times N.
+    chance = np.divide(expected_, n_, out=np.zeros_like(expected_), where=n_ > 0).sum(axis=1)
+    pooled = _ratio(agreed_.sum(axis=1) - chance, total - chance)
+    return np.column_stack([per_condition, pooled])
+
+
+def krippendorff_alpha(
+    tables: np.ndarray, categories: Categories, level: str = "nominal"
+) -> np.ndarray:
+    """Return Krippendorff's alpha per condition and pooled, (replicates × conditions + 1).
+
+    `tables` holds coincidence tables (see `coincidence_contributions`)
+    for each replicate.  alpha = 1 − (n − 1) Σ o·δ / Σ n_v n_v'·δ, with
+    δ = [v ≠ v'] (nominal) or (x_v − x_v')² over the values normalised
+    to [0, 1] (interval).  The pooled alpha takes the observed
+    disagreement over all conditions and the expected disagreement
+    within each condition, weighted by its number of pairable values:
+    alpha = 1 − Σ_k Σ o·δ / Σ_k (Σ n_v n_v'·δ) / (n_k − 1).
+    """
+    observed = []
+    expected_parts = []
+    totals = []
+    for k, block in enumerate(_blocks(tables, categories)):
+        marginals = block.sum(axis=2)
+        n = marginals.sum(axis=1)
+        if level == "nominal":
+            observed.append(n - np.trace(block, axis1=1, axis2=2))
+            expected_parts.append((marginals ** 2).sum(axis=1))
+        else:
+            lower, upper = CONDITION_BOUNDS[CONDITIONS[k]]
+            x = (categories.values[k] - lower) / (upper - lower)
+            delta = (x[:, None] - x[None, :]) ** 2
+            observed.append(np.einsum("rij,ij->r", block, delta))
+            expected_parts.append(np.stack([marginals @ x, marginals @ x ** 2], axis=1))
+        totals.append(n)
+    observed_ = np.stack(observed, axis=1)
+    n_ = np.stack(totals, axis=1)
+    if level == "nominal":
+        expected_ = n_ ** 2 - np.stack(expected_parts, axis=1)
+    else:
+        sums = np.stack(expected_parts, axis=1)  # (replicates × conditions × [Σx, Σx²])
+        # Σ n_v n_v' (x_v − x_v')² = 2 n Σ n_v x_v² − 2 (Σ n_v x_v)²
+        expected_ = 2 * n_ * sums[:, :, 1] - 2 * sums[:, :, 0] ** 2
+    per_condition = 1 - _ratio((n_ - 1) * observed_, expected_)
+    expected_pooled = np.divide(
+        expected_, n_ - 1, out=np.zeros_like(expected_), where=n_ > 1
+    ).sum(axis=1)
+    pooled = 1 - _ratio(observed_.sum(axis=1), expected_pooled)
+    return np.column_stack([per_condition, pooled])
+
+
+###############################################################################
+# Bootstrap
+###############################################################################
+
+def bootstrap_counts(
+    n_policies: int, replicates: int, rng: np.random.Generator
+) -> Iterator[np.ndarray]:
+    """Yield batches of (replicates × policies) policy counts.
+
+    Each row counts how often each policy was drawn when resampling
+    `n_policies` policies with replacement.
+    """
+    done = 0
+    while done < replicates:
+        batch = min(BATCH_SIZE, replicates - done)
+        draws = rng.integers(0, n_policies, size=(batch, n_policies))
+        draws += np.arange(batch)[:, None] * n_policies
+        counts = np.bincount(draws.ravel(), minlength=batch * n_policies)
+        yield counts.reshape(batch, n_policies).astype(float)
+        done += batch
+
+
+class Statistic(NamedTuple):
+    """One reliability statistic over a set of coders."""
+
+    name: str                   # "cohen_kappa" or "krippendorff_alpha"
+    coders: Tuple[int, ...]     # indices into the coding array
+    contributions: np.ndarray   # per‑policy tables
+
+
+class Estimate(NamedTuple):
+    """A statistic for one condition (or ``all``) with its confidence interval."""
+
+    statistic: str
+    coders: str
+    condition: str
+    units: int                  # (policy, condition) units coded by at least two coders
+    estimate: float
+    ci_low: float
+    ci_high: float
+
+
+def estimate(
+    statistics: List[Statistic],
+    coder_names: List[str],
+    categories: Categories,
+    level: str,
+    replicates: int,
+    confidence: float,
+    rng: np.random.Generator,
+) -> List[Estimate]:
+    """Compute every statistic with a bootstrap confidence interval.
+
+    All statistics share the same replicates, and each batch of
+    replicates costs one matrix product with the stacked
+    contributions.
+    """
+    edges = np.cumsum([0] + [s.contributions.shape[1] for s in statistics])
+    stacked = np.hstack([s.contributions for s in statistics])
+
+    def compute(tables: np.ndarray) -> List[np.ndarray]:
+        results = []
+        for statistic, lo, hi in zip(statistics, edges[:-1], edges[1:]):
+            if statistic.name == "cohen_kappa":
+                results.append(cohen_kappa(tables[:, lo:hi], categories))
+            else:
+                results.append(krippendorff_alpha(tables[:, lo:hi], categories, level))
+        return results
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        point = compute(stacked.sum(axis=0, keepdims=True))
+        samples: List[List[np.ndarray]] = [[] for _ in statistics]
+        for counts in bootstrap_counts(stacked.shape[0], replicates, rng):
+            for collected, result in zip(samples, compute(counts @ stacked)):
+                collected.append(result)
+    tail = (1 - confidence) / 2 * 100
+    estimates = []
+    for statistic, value, collected in zip(statistics, point, samples):
+        low = high = np.full(value.shape[1], np.nan)
+        if collected:
+            draws = np.vstack(collected)
+            defined = ~np.isnan(draws).all(axis=0)
+            if defined.any():
+                low, high = np.full_like(low, np.nan), np.full_like(high, np.nan)
+                low[defined], high[defined] = np.nanpercentile(
+                    draws[:, defined], [tail, 100 - tail], axis=0
+                )
+        pairable = (categories.codes[list(statistic.coders)] >= 0).sum(axis=0) >= 2
+        units = list(pairable.sum(axis=0)) + [pairable.sum()]
+        for k, condition in enumerate(CONDITIONS + ["all"]):
+            estimates.append(
+                Estimate(
+                    statistic.name,
+                    "+".join(coder_names[i] for i in statistic.coders),
+                    condition,
+                    int(units[k]),
+                    float(value[0, k]),
+                    float(low[k]),
+                    float(high[k]),
+                )
+            )
+    return estimates
+
+
+def reliability_statistics(coders: List[str], categories: Categories) -> List[Statistic]:
+    """Return Cohen's kappa for every pair of coders and Krippendorff's alpha.
+
+    Alpha is computed over the human coders (if there are at least
+    two) and, if the heuristic takes part, over all coders.
+    """
+    statistics = [
+        Statistic("cohen_kappa", (a, b), contingency_contributions(categories, a, b))
+        for a, b in combinations(range(len(coders)), 2)
+    ]
+    humans = tuple(i for i, coder in enumerate(coders) if coder != HEURISTIC)
+    coder_sets = []
+    if len(humans) >= 2:
+        coder_sets.append(humans)
+    if len(humans) < len(coders) and len(coders) >= 2:
+        coder_sets.append(tuple(range(len(coders))))
+    for coder_set in coder_sets:
+        statistics.append(
+            Statistic(
+                "krippendorff_alpha",
+                coder_set,
+                coincidence_contributions(categories, coder_set),
+            )
+        )
+    return statistics
+
+
+def _format(value: float) -> str:
+    return "" if np.isnan(value) else f"{value:.4f}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Inter-coder reliability of the C1-C8 codings with bootstrap intervals."
+    )
+    parser.add_argument(
+        "--replicates", type=int, default=10000, help="Bootstrap replicates (default: 10000)"
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="Confidence level (default: 0.95)"
+    )
+    parser.add_argument(
+        "--level",
+        choices=("nominal", "interval"),
+        default="nominal",
+        help="Measurement level for Krippendorff's alpha (default: nominal)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument(
+        "--scores", type=Path, default=OUTPUT_CSV, help="Score table with the heuristic values"
+    )
+    parser.add_argument(
+        "--no-heuristic",
+        action="store_true",
+        help="Only compare the human coders",
+    )
+    args = parser.parse_args(argv)
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+    if args.replicates < 1:
+        parser.error("--replicates must be at least 1")
+
+    codings = load_human_codings()
+    if HEURISTIC in codings:
+        print(f'Coder name "{HEURISTIC}" is reserved for the score table.')
+        return 1
+    policies = sorted({policy for coded in codings.values() for policy in coded})
+    if not args.no_heuristic:
+        if not args.scores.is_file():
+            print(f"Score table not found: {args.scores}. Run compute_policy_scores.py first.")
+            return 1
+        heuristic = load_heuristic_codings(args.scores)
+        missing = [policy for policy in policies if policy not in heuristic]
+        if missing:
+            print(f"Warning: {len(missing)} coded policies are not in {args.scores}")
+        codings[HEURISTIC] = {p: heuristic[p] for p in policies if p in heuristic}
+    coders = sorted(c for c in codings if c != HEURISTIC) + (
+        [HEURISTIC] if HEURISTIC in codings else []
+    )
+    if len(coders) < 2 or not policies:
+        print(f"Need codings of at least two coders in {SNIPPETS_DIR}/*/{CODINGS_NAME}.")
+        return 1
+
+    categories = categorise(coding_array(codings, coders, policies))
+    statistics = reliability_statistics(coders, categories)
+    rng = np.random.default_rng(args.seed)
+    estimates = estimate(
+        statistics, coders, categories, args.level, args.replicates, args.confidence, rng
+    )
+
+    OUTPUT_RELIABILITY.parent.mkdir(parents=True, exist_ok=True)
+    with OUTPUT_RELIABILITY.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(Estimate._fields)
+        for e in estimates:
+            writer.writerow(
+                list(e[:4]) + [_format(e.estimate), _format(e.ci_low), _format(e.ci_high)]
+            )
+
+    level = f"{args.confidence:.0%}"
+    for e in estimates:
+        if e.condition == "all":
+            print(
+                f"{e.statistic} {e.coders}: {_format(e.estimate) or 'undefined'} "
+                f"({level} CI {_format(e.ci_low) or '?'}–{_format(e.ci_high) or '?'}, "
+                f"{e.units} units)"
+            )
+    print(
+        f"{len(coders)} coders, {len(policies)} policies, "
+        f"{args.replicates} bootstrap replicates."
+    )
+    print(f"Wrote {OUTPUT_RELIABILITY}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
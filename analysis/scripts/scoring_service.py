@@ -0,0 +1,298 @@
+"""
+scoring_service.py
+==================
+
+Local HTTP service that scores policy texts with the rules of
+`compute_policy_scores.py`, for pipelines that want scores as
+documents arrive without starting a Python process per document.
+
+The rules are compiled once at start‑up and stay warm.  Requests are
+handled on threads, but their texts are scored by a single batcher:
+texts that arrive within ``--batch-window`` milliseconds of each other
+(up to ``--max-batch`` texts) form one batch, identical texts in a
+batch are scored once, and recently scored texts are answered from an
+in‑memory LRU cache keyed by their SHA‑256 (``--cache-size``).  With
+``--jobs N`` each batch is spread over N worker processes, started
+once with the rules already compiled.
+
+Endpoints:
+
+- ``POST /score`` with a JSON body ``{"texts": ["...", ...]}`` (or
+  ``{"text": "..."}``) and optionally ``"all_languages": true``.
+  Returns ``{"results": [...]}`` with one object per text holding
+  ``rule_languages``, ``C1`` … ``C8``, ``initial_score`` and
+  ``updated_score``, as in `policy_scores.csv`.
+- ``GET /health`` returns the number of patterns and cached results.
+
+The service has no authentication and binds to 127.0.0.1 by default;
+do not expose it on a public interface.
+
+Usage
+-----
+
+    python analysis/scripts/scoring_service.py [--host HOST] [--port PORT]
+        [--jobs N] [--batch-window MS] [--max-batch N] [--cache-size N]
+
+Example:
+
+    curl -s localhost:8765/score -d '{"text": "Publications must be deposited."}'
+"""
+
+import argparse
+import concurrent.futures
+import json
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from compute_policy_scores import (
+    CLASSIFIERS,
+    DEFAULT_CACHE_SIZE,
+    SCANNER,
+    TextScore,
+    score_texts,
+    text_digest,
+)
+
+DEFAULT_PORT = 8765
+
+# Largest request body accepted, in bytes.
+MAX_BODY = 64 * 1024 * 1024
+
+
+class Batcher:
+    """Score texts from concurrent requests in shared batches.
+
+    `score` may be called from any thread; a single background thread
+    collects the texts, scores each batch with `score_texts` and hands
+    the results back.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_batch: int,
+        cache_size: int,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ) -> None:
+        self.window = window
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self.executor = executor
+        self.cache: "OrderedDict[Tuple[str, bool], TextScore]" = OrderedDict()
+        self._queue: "queue.Queue[Tuple[str, bool, concurrent.futures.Future]]" = (
+            queue.Queue()
+        )
+        threading.Thread(target=self._run, name="batcher", daemon=True).start()
+
+    def score(self, texts: List[str], all_languages: bool = False) -> List[TextScore]:
+        """Return the TextScore of every text, in order."""
+        futures = []
+        for text in texts:
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            self._queue.put((text, all_languages, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._score_batch(batch)
+            except Exception as exc:
+                # Never let the thread die: nothing would resolve later
+                # requests.
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _score_batch(
+        self, batch: List[Tuple[str, bool, concurrent.futures.Future]]
+    ) -> None:
+        # {(digest, all_languages): (text, futures waiting for it)}
+        pending: Dict[Tuple[str, bool], Tuple[str, list]] = {}
+        for text, all_languages, future in batch:
+            key = (text_digest(text), all_languages)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                future.set_result(cached)
+            else:
+                pending.setdefault(key, (text, []))[1].append(future)
+        for all_languages in (False, True):
+            keys = [key for key in pending if key[1] == all_languages]
+            if not keys:
+                continue
+            texts = [pending[key][0] for key in keys]
+            try:
+                results = list(score_texts(texts, all_languages, self.executor))
+            except Exception as exc:
+                for key in keys:
+                    for future in pending[key][1]:
+                        future.set_exception(exc)
+                continue
+            for key, result in zip(keys, results):
+                for future in pending[key][1]:
+                    future.set_result(result)
+                self.cache[key] = result
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+def result_json(result: TextScore) -> dict:
+    """Return a TextScore as a row of `policy_scores.csv` (without file and metadata)."""
+    return {
+        "rule_languages": "+".join(result.languages),
+        **{cond: result.values[cond] for cond in CLASSIFIERS},
+        "initial_score": result.initial_score,
+        "updated_score": result.updated_score,
+    }
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a Batcher (see the module docstring)."""
+
+    server: "ScoringServer"
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._reply(404, {"error": f"unknown path {self.path}"})
+            return
+        self._reply(
+            200,
+            {
+                "status": "ok",
+                "patterns": len(SCANNER.patterns),
+                "cached": len(self.server.batcher.cache),
+            },
+        )
+
+    def do_POST(self) -> None:
+        if self.path != "/score":
+            self._reply(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            length = -1
+        if not 0 < length <= MAX_BODY:
+            self._reply(400, {"error": f"Content-Length must be 1 to {MAX_BODY} bytes"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(request, dict):
+                raise ValueError("the body must be a JSON object")
+            texts = request["texts"] if "texts" in request else [request["text"]]
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError('"texts" must be a list of strings')
+            for text in texts:
+                try:
+                    text.encode("utf-8")
+                except UnicodeEncodeError:
+                    raise ValueError("texts must be valid Unicode (no lone surrogates)")
+            all_languages = request.get("all_languages", False)
+            if not isinstance(all_languages, bool):
+                raise ValueError('"all_languages" must be true or false')
+        except (KeyError, ValueError, UnicodeDecodeError) as exc:
+            message = f"missing {exc}" if isinstance(exc, KeyError) else str(exc)
+            self._reply(400, {"error": message})
+            return
+        try:
+            results = self.server.batcher.score(texts, all_languages)
+        except Exception as exc:
+            self._reply(500, {"error": str(exc)})
+            return
+        self._reply(200, {"results": [result_json(r) for r in results]})
+
+    def log_message(self, format: str, *args) -> None:
+        # One line per request on stderr is too much at high throughput.
+        pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog (5) resets connections from concurrent
+    # clients.
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], batcher: Batcher) -> None:
+        super().__init__(address, ScoringHandler)
+        self.batcher = batcher
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local HTTP service scoring policy texts.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes scoring each batch (default: 1, score in the service process)",
+    )
+    parser.add_argument(
+        "--batch-window",
+        type=float,
+        default=2.0,
+        metavar="MS",
+        help="How long to collect texts into a batch, in milliseconds (default: 2)",
+    )
+    parser.add_argument(
+        "--max-batch", type=int, default=64, help="Largest batch in texts (default: 64)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"Results kept in memory (default: {DEFAULT_CACHE_SIZE})",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1 or args.max_batch < 1:
+        parser.error("--jobs and --max-batch must be at least 1")
+
+    # Compile before starting workers, so forked workers inherit the
+    # compiled rules.
+    SCANNER.compile()
+    executor = None
+    if args.jobs > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs)
+    batcher = Batcher(args.batch_window / 1000, args.max_batch, args.cache_size, executor)
+    server = ScoringServer((args.host, args.port), batcher)
+    host, port = server.server_address[:2]
+    print(f"Scoring on http://{host}:{port}/score ({len(SCANNER.patterns)} patterns).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if executor is not None:
+            executor.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+text_normalisation.py
+=====================
+
+Normalisation of extracted policy texts before rule matching.
+
+pdftotext output splits words and phrases across lines, may contain
+ligature characters, and spells umlauts both ways ("müssen",
+"muessen").  `normalise_text` removes these differences in one pass:
+
+1. Unicode NFC (only for texts that are not already in NFC);
+2. ligatures are expanded (``ﬁ`` → ``fi``);
+3. a word hyphenated at a line break is joined ("Veröffent-" +
+   "lichung"), unless the next line starts with a capital (the hyphen
+   is kept: "Open-Access") or with a conjunction ("Forschungs- und");
+4. whitespace is collapsed: a run containing a blank line becomes
+   ``"\\n\\n"`` (a paragraph break), any other run of spaces, tabs and
+   line breaks a single space.  Form feeds (page breaks) are kept;
+5. umlauts and ß are folded to their ASCII spellings (``ä`` → ``ae``,
+   ``Ü`` → ``Ue``, ``ß`` → ``ss``).  Rule patterns are folded with the
+   same `fold`, so a rule written as ``müssen`` matches both spellings.
+
+Every character of the result records the offset of the original
+character it came from (`Normalised.offsets`), so matches in the
+normalised text can be mapped back to the text file.
+
+`cached_normalise` keeps the result of each text in
+`analysis/outputs/.cache/normalised/` under the SHA‑256 of the
+original text, and reads it back through a memory map, so a text is
+normalised only once.  `normalise_chunks` normalises a text supplied in
+chunks with the same result as normalising it whole.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence
+
+NORMALISED_DIR = (
+    Path(__file__).resolve().parents[2]
+    / "analysis"
+    / "outputs"
+    / ".cache"
+    / "normalised"
+)
+
+LIGATURES = {
+    "ﬀ": "ff",
+    "ﬁ": "fi",
+    "ﬂ": "fl",
+    "ﬃ": "ffi",
+    "ﬄ": "ffl",
+    "ﬅ": "st",
+    "ﬆ": "st",
+}
+
+FOLDS = {
+    "ä": "ae",
+    "ö": "oe",
+    "ü": "ue",
+    "ß": "ss",
+    "Ä": "Ae",
+    "Ö": "Oe",
+    "Ü": "Ue",
+    "ẞ": "SS",
+}
+
+# A hyphen at a line break between two words; see `_replacement`.
+_HYPHEN_BREAK = r"(?<=\w)-[ \t]*\n[ \t]*(?=\w)"
+# Whitespace other than single spaces, never including form feeds.
+_WHITESPACE = r"[^\S\f]{2,}|[^\S \f]"
+
+EDITS = re.compile(
+    "|".join(
+        [
+            _HYPHEN_BREAK,
+            _WHITESPACE,
+            "[" + "".join(LIGATURES) + "".join(FOLDS) + "]",
+        ]
+    )
+)
+
+# Words after a line‑break hyphen that mark an elided compound part
+# ("Forschungs- und Lehrbetrieb"), so the hyphen is kept.
+CONJUNCTION = re.compile(r"(?:und|oder|bzw|sowie|and|or)\b")
+
+_FOLD_TABLE = str.maketrans(FOLDS)
+
+# `normalise_chunks` carries at most this many characters over to the
+# next chunk; only a text without whitespace over this length is cut
+# where a normalisation step may look across the cut.
+MAX_CARRY = 1 << 20
+
+# Stored in every artefact; artefacts written by other rules are
+# recomputed.
+NORMALISATION_KEY = int(
+    hashlib.sha256(
+        repr(
+            (sorted(LIGATURES.items()), sorted(FOLDS.items()), EDITS.pattern, CONJUNCTION.pattern)
+        ).encode("utf-8")
+    ).hexdigest()[:15],
+    16,
+)
+
+
+class Normalised(NamedTuple):
+    """A normalised text, or a piece of one."""
+
+    text: str
+    # Offset in the original text of every character of `text`.
+    offsets: Sequence[int]
+
+
+def fold(text: str) -> str:
+    """Fold umlauts and ß in `text` (also used for rule patterns)."""
+    return text.translate(_FOLD_TABLE)
+
+
+def lower_text(text: str) -> str:
+    """Lower‑case `text` without changing its length.
+
+    Rules are matched in the lower‑cased text and their positions are
+    looked up in `Normalised.offsets`, so every character must stay one
+    character.  The few whose lower case is longer (``İ`` → ``i̇``)
+    are kept as they are.
+    """
+    lower = text.lower()
+    # No character lower‑cases to nothing, so equal lengths mean every
+    # character stayed one character.
+    if len(lower) == len(text):
+        return lower
+    return "".join(c if len(low := c.lower()) != 1 else low for c in text)
+
+
+def _replacement(text: str, m: "re.Match[str]") -> str:
+    """Return what the EDITS match `m` in `text` is replaced with."""
+    found = m.group()
+    if found[0] == "-":
+        following = text[m.end()]
+        if following.isupper() or CONJUNCTION.match(text, m.end()):
+            return "-" if following.isupper() else "- "
+        return ""
+    if found in LIGATURES:
+        return LIGATURES[found]
+    if found in FOLDS:
+        return FOLDS[found]
+    return "\n\n" if found.count("\n") >= 2 else " "
+
+
+def _nfc(text: str, position: int) -> Normalised:
+    """Return `text` in NFC, with offsets counted from `position`."""
+    pieces = []
+    offsets = array("q")
+    start = 0
+    for i in range(1, len(text) + 1):
+        if i < len(text) and unicodedata.combining(text[i]):
+            continue
+        cluster = unicodedata.normalize("NFC", text[start:i])
+        pieces.append(cluster)
+        offsets.extend([position + start] * len(cluster))
+        start = i
+    return Normalised("".join(pieces), offsets)
+
+
+def normalise_text(text: str, position: int = 0) -> Normalised:
+    """Normalise `text` (see the module docstring).
+
+    Offsets are counted from `position`, the offset of `text` in the
+    whole document.
+    """
+    source: Sequence[int] = range(position, position + len(text))
+    if not unicodedata.is_normalized("NFC", text):
+        text, source = _nfc(text, position)
+    pieces = []
+    offsets = array("q")
+    done = 0
+    for m in EDITS.finditer(text):
+        start = m.start()
+        pieces.append(text[done:start])
+        offsets.extend(source[done:start])
+        replacement = _replacement(text, m)
+        pieces.append(replacement)
+        offsets.extend([source[start]] * len(replacement))
+        done = m.end()
+    pieces.append(text[done:])
+    offsets.extend(source[done:])
+    return Normalised("".join(pieces), offsets)
+
+
+def _safe_cut(text: str) -> int:
+    """Return the start of the last whitespace run in `text` that follows
+    a character other than whitespace or ``-``, or 0 if there is none.
+
+    No step of the normalisation looks across such a position.
+    """
+    for i in range(len(text) - 1, 0, -1):
+        if text[i] != "\f" and text[i].isspace():
+            before = text[i - 1]
+            if before != "-" and not before.isspace():
+                return i
+    return 0
+
+
+def normalise_chunks(chunks: Iterable[str]) -> Iterator[Normalised]:
+    """Normalise a text supplied as successive chunks.
+
+    Each chunk is normalised up to its last safe cut (`_safe_cut`) and
+    the rest is carried over to the next chunk, so the pieces
+    concatenate to `normalise_text` of the whole text.  Text without a
+    safe cut is carried over whole, up to MAX_CARRY characters.
+    """
+    carry = ""
+    position = 0  # offset of `carry` in the whole text
+    for chunk in chunks:
+        text = carry + chunk
+        cut = _safe_cut(text)
+        if not cut:
+            if len(text) <= MAX_CARRY:
+                carry = text
+                continue
+            cut = len(text)
+        yield normalise_text(text[:cut], position)
+        position += cut
+        carry = text[cut:]
+    if carry:
+        yield normalise_text(carry, position)
+
+
+def save_normalised(path: Path, normalised: Normalised) -> None:
+    """Write a normalised text atomically.
+
+    The file holds NORMALISATION_KEY, the number of characters and the
+    length of the UTF‑8 text, then the offsets (native 64‑bit
+    integers) and the text.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    encoded = normalised.text.encode("utf-8")
+    header = array("q", [NORMALISATION_KEY, len(normalised.offsets), len(encoded)])
+    offsets = normalised.offsets
+    if not isinstance(offsets, array):
+        offsets = array("q", offsets)
+    # Pool workers may normalise identical texts at the same time.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        header.tofile(f)
+        offsets.tofile(f)
+        f.write(encoded)
+    os.replace(tmp_path, path)
+
+
+def load_normalised(path: Path) -> Optional[Normalised]:
+    """Read a file written by `save_normalised`; None if it is missing or stale.
+
+    The offsets are a view of the memory‑mapped file, so they are only
+    paged in where they are used.
+    """
+    try:
+        with path.open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    view = memoryview(mapped)
+    header_size = 3 * 8
+    if len(view) < header_size:
+        return None
+    key, count, size = view[:header_size].cast("q")
+    text_start = header_size + 8 * count
+    if key != NORMALISATION_KEY or len(view) != text_start + size:
+        return None
+    offsets = view[header_size:text_start].cast("q")
+    return Normalised(str(view[text_start:], "utf-8"), offsets)
+
+
+def cached_normalise(
+    text: str, digest: str, directory: Path = NORMALISED_DIR
+) -> Normalised:
+    """Return `normalise_text` of `text`, cached in `directory` under `digest`."""
+    path = directory / f"{digest}.norm"
+    normalised = load_normalised(path)
+    if normalised is None:
+        normalised = normalise_text(text)
+        save_normalised(path, normalised)
+    return normalised
@@ -0,0 +1,315 @@
+"""
+weight_sensitivity.py
+=====================
+
+Test how robust the MELIBEA policy rankings are to the choice of
+weights.
+
+`compute_policy_scores.py` only evaluates two weight sets
+(`INITIAL_WEIGHTS` and `UPDATED_WEIGHTS`).  This script loads the raw
+C1–C8 values it wrote to `policy_scores.csv` into a NumPy matrix,
+normalises them with `CONDITION_BOUNDS` as array operations and scores
+every policy under thousands of alternative weight vectors with one
+matrix multiplication per batch.  Two families of weight vectors are
+supported:
+
+- Dirichlet samples over all eight conditions (``--samples``,
+  ``--alpha``), i.e. random weightings that sum to 1;
+- a grid over the C2/C4/C7 emphasis of the updated formula
+  (``--grid STEP``): every combination of C2, C4 and C7 weights in
+  multiples of STEP that sums to 1, with the other conditions at 0
+  (STEP must divide 1, e.g. 0.05, 0.1 or 0.25).
+
+For every policy the script reports its rank under the initial and
+updated weights and how its rank varies across the sweep (mean,
+standard deviation, best, worst and the share of weightings that
+place it in the top ``--top-k``).  Ranks use competition ranking
+(tied scores share the best rank), and scores are rounded to two
+decimals like `score_policy`.  The mean Spearman correlation (on
+average ranks, so that ties are handled correctly) between
+each sampled ranking and the initial ranking is printed as an overall
+stability measure.  Results are written to
+`analysis/outputs/tables/weight_sensitivity.csv`.
+
+Usage
+-----
+
+    python analysis/scripts/weight_sensitivity.py [--samples N] [--alpha A]
+        [--grid STEP] [--top-k K] [--seed S] [--input CSV]
+
+Run `compute_policy_scores.py` first so that the input table exists.
+Requires NumPy.
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from compute_policy_scores import (
+    CONDITION_BOUNDS,
+    INITIAL_WEIGHTS,
+    OUTPUT_CSV,
+    UPDATED_WEIGHTS,
+)
+
+CONDITIONS = list(CONDITION_BOUNDS)
+
+OUTPUT_SENSITIVITY = OUTPUT_CSV.with_name("weight_sensitivity.csv")
+
+# Number of weight vectors scored per matrix multiplication.  Bounds
+# memory to about policies × BATCH_SIZE floats.
+BATCH_SIZE = 10000
+
+
+def load_raw_values(path: Path) -> Tuple[List[str], np.ndarray]:
+    """Return the policy names and the (policies × 8) raw value matrix."""
+    names = []
+    rows = []
+    with path.open("r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            names.append(row["policy_file"])
+            rows.append([float(row[cond]) for cond in CONDITIONS])
+    return names, np.array(rows, dtype=float).reshape(len(rows), len(CONDITIONS))
+
+
+def normalise_matrix(raw: np.ndarray) -> np.ndarray:
+    """Vectorised `normalise`: clip each column to its bounds and scale to [0, 1]."""
+    lower = np.array([CONDITION_BOUNDS[c][0] for c in CONDITIONS], dtype=float)
+    upper = np.array([CONDITION_BOUNDS[c][1] for c in CONDITIONS], dtype=float)
+    span = upper - lower
+    clipped = np.clip(raw, lower, upper)
+    # Degenerate ranges normalise to 0, as in normalise().
+    safe_span = np.where(span == 0, 1.0, span)
+    return np.where(span == 0, 0.0, (clipped - lower) / safe_span)
+
+
+def weight_vector(weights: Dict[str, float]) -> np.ndarray:
+    """Return a weight dict as a vector in CONDITIONS order."""
+    return np.array([weights.get(c, 0.0) for c in CONDITIONS], dtype=float)
+
+
+def dirichlet_weights(n: int, alpha: float, rng: np.random.Generator) -> np.ndarray:
+    """Return `n` random weight vectors (rows) drawn from Dirichlet(alpha)."""
+    return rng.dirichlet(np.full(len(CONDITIONS), alpha), size=n)
+
+
+# How far 1 / STEP may be from a whole number for --grid.
+GRID_TOLERANCE = 1e-9
+
+
+def grid_steps(step: float) -> int:
+    """Return the number of grid steps between 0 and 1 for `step`.
+
+    Raises ValueError unless `step` is in (0, 1] and divides 1.
+    """
+    if not 0 < step <= 1:
+        raise ValueError(f"--grid must be in (0, 1], got {step:g}")
+    steps = round(1.0 / step)
+    if abs(steps * step - 1.0) > GRID_TOLERANCE:
+        raise ValueError(f"--grid {step:g} does not divide 1 (use e.g. 0.05, 0.1 or 0.25)")
+    return steps
+
+
+def grid_weights(step: float) -> np.ndarray:
+    """Return all C2/C4/C7 weightings in multiples of `step` that sum to 1.
+
+    Raises ValueError for a step that `grid_steps` rejects.
+    """
+    steps = grid_steps(step)
+    i, j = np.meshgrid(np.arange(steps + 1), np.arange(steps + 1), indexing="ij")
+    mask = i + j <= steps
+    parts = np.stack([i[mask], j[mask], steps - i[mask] - j[mask]], axis=1) / steps
+    weights = np.zeros((len(parts), len(CONDITIONS)))
+    for column, cond in zip(parts.T, ("C2", "C4", "C7")):
+        weights[:, CONDITIONS.index(cond)] = column
+    return weights
+
+
+def score_matrix(normalised: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Score every policy under every weight vector: (policies × vectors)."""
+    return np.round(normalised @ weights.T * 100, 2)
+
+
+def competition_ranks(scores: np.ndarray) -> np.ndarray:
+    """Rank policies within each column (1 = highest score, ties share a rank)."""
+    n = scores.shape[0]
+    order = np.argsort(-scores, axis=0, kind="stable")
+    ordered = np.take_along_axis(scores, order, axis=0)
+    positions = np.broadcast_to(np.arange(n)[:, None], scores.shape)
+    is_new = np.ones(scores.shape, dtype=bool)
+    is_new[1:] = ordered[1:] != ordered[:-1]
+    first = np.maximum.accumulate(np.where(is_new, positions, 0), axis=0)
+    ranks = np.empty(scores.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, first + 1, axis=0)
+    return ranks
+
+
+def average_ranks(scores: np.ndarray) -> np.ndarray:
+    """Rank policies within each column (1 = highest score, ties share their mean rank)."""
+    n = scores.shape[0]
+    order = np.argsort(-scores, axis=0, kind="stable")
+    ordered = np.take_along_axis(scores, order, axis=0)
+    positions = np.broadcast_to(np.arange(n)[:, None], scores.shape)
+    is_first = np.ones(scores.shape, dtype=bool)
+    is_first[1:] = ordered[1:] != ordered[:-1]
+    is_last = np.ones(scores.shape, dtype=bool)
+    is_last[:-1] = is_first[1:]
+    first = np.maximum.accumulate(np.where(is_first, positions, 0), axis=0)
+    last = np.minimum.accumulate(np.where(is_last, positions, n - 1)[::-1], axis=0)[::-1]
+    ranks = np.empty(scores.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=0)
+    return ranks
+
+
+def spearman_to_reference(ranks: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Spearman's rho of each rank column with a reference rank vector.
+
+    Both must be `average_ranks`, so that rho is the Pearson correlation
+    of the ranks also when scores are tied.
+    """
+    centred = ranks - ranks.mean(axis=0)
+    ref = reference - reference.mean()
+    denom = np.sqrt((centred ** 2).sum(axis=0) * (ref ** 2).sum())
+    return np.divide(
+        centred.T @ ref, denom, out=np.ones(ranks.shape[1]), where=denom > 0
+    )
+
+
+def sweep(
+    normalised: np.ndarray, weights: np.ndarray, reference: np.ndarray, top_k: int
+) -> Dict[str, np.ndarray]:
+    """Accumulate per‑policy rank statistics over all weight vectors.
+
+    Weight vectors are processed in batches of BATCH_SIZE; only running
+    sums, minima and maxima are kept between batches.  `reference` holds
+    the `average_ranks` that Spearman's rho is computed against.
+    """
+    n = normalised.shape[0]
+    total = np.zeros(n)
+    total_sq = np.zeros(n)
+    best = np.full(n, np.iinfo(np.int64).max)
+    worst = np.zeros(n, dtype=np.int64)
+    in_top = np.zeros(n)
+    rho_sum = 0.0
+    for start in range(0, len(weights), BATCH_SIZE):
+        scores = score_matrix(normalised, weights[start:start + BATCH_SIZE])
+        ranks = competition_ranks(scores)
+        total += ranks.sum(axis=1)
+        total_sq += (ranks.astype(float) ** 2).sum(axis=1)
+        best = np.minimum(best, ranks.min(axis=1))
+        worst = np.maximum(worst, ranks.max(axis=1))
+        in_top += (ranks <= top_k).sum(axis=1)
+        rho_sum += spearman_to_reference(average_ranks(scores), reference).sum()
+    count = len(weights)
+    mean = total / count
+    return {
+        "mean_rank": mean,
+        "sd_rank": np.sqrt(np.maximum(total_sq / count - mean ** 2, 0.0)),
+        "best_rank": best,
+        "worst_rank": worst,
+        "top_k_share": in_top / count,
+        "mean_spearman": np.array(rho_sum / count),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Rank-stability analysis of MELIBEA scores under alternative weights."
+    )
+    parser.add_argument("--input", type=Path, default=OUTPUT_CSV, help="Score table to read")
+    parser.add_argument(
+        "--samples", type=int, default=10000, help="Number of Dirichlet weight vectors"
+    )
+    parser.add_argument(
+        "--alpha", type=float, default=1.0, help="Dirichlet concentration (default: 1.0)"
+    )
+    parser.add_argument(
+        "--grid",
+        type=float,
+        default=None,
+        metavar="STEP",
+        help="Also sweep a C2/C4/C7 weight grid with this step (e.g. 0.05)",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=10, help="Report the share of weightings in the top K"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args(argv)
+    grid = None
+    if args.grid is not None:
+        try:
+            grid = grid_weights(args.grid)
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    if not args.input.is_file():
+        print(f"Score table not found: {args.input}. Run compute_policy_scores.py first.")
+        return 1
+    names, raw = load_raw_values(args.input)
+    if not names:
+        print(f"No policies in {args.input}.")
+        return 1
+    normalised = normalise_matrix(raw)
+
+    rng = np.random.default_rng(args.seed)
+    batches = [dirichlet_weights(args.samples, args.alpha, rng)]
+    if grid is not None:
+        batches.append(grid)
+        print(
+            f"Grid: {len(grid)} C2/C4/C7 weightings in steps of {1 / grid_steps(args.grid):g}."
+        )
+    weights = np.vstack(batches)
+    if not len(weights):
+        print("No weight vectors to evaluate.")
+        return 1
+
+    fixed = np.stack([weight_vector(INITIAL_WEIGHTS), weight_vector(UPDATED_WEIGHTS)])
+    fixed_scores = score_matrix(normalised, fixed)
+    fixed_ranks = competition_ranks(fixed_scores)
+    stats = sweep(normalised, weights, average_ranks(fixed_scores[:, :1])[:, 0], args.top_k)
+
+    OUTPUT_SENSITIVITY.parent.mkdir(parents=True, exist_ok=True)
+    fieldnames = [
+        "policy_file",
+        "initial_score",
+        "initial_rank",
+        "updated_rank",
+        "mean_rank",
+        "sd_rank",
+        "best_rank",
+        "worst_rank",
+        f"top_{args.top_k}_share",
+    ]
+    with OUTPUT_SENSITIVITY.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        for i, name in enumerate(names):
+            writer.writerow(
+                [
+                    name,
+                    f"{fixed_scores[i, 0]:.2f}",
+                    fixed_ranks[i, 0],
+                    fixed_ranks[i, 1],
+                    f"{stats['mean_rank'][i]:.2f}",
+                    f"{stats['sd_rank'][i]:.2f}",
+                    stats["best_rank"][i],
+                    stats["worst_rank"][i],
+                    f"{stats['top_k_share'][i]:.4f}",
+                ]
+            )
+
+    print(f"Evaluated {len(weights)} weight vectors over {len(names)} policies.")
+    print(
+        "Mean Spearman correlation with the initial ranking: "
+        f"{float(stats['mean_spearman']):.3f}"
+    )
+    print(f"Wrote {OUTPUT_SENSITIVITY}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,79 @@
 #!/usr/bin/env python3
 """Lint OA policy tables against validation rules.
 This script loads a YAML file of rules and checks TSV files for compliance.
+
+The rules are compiled once into a validation plan (a set of allowed
+values and a precompiled regex per column).  With NumPy installed, files
+are validated a block of rows and a whole column at a time: each distinct
+value in a column is checked once and the result is broadcast to its rows.
+Without NumPy every row is checked in turn.  Both paths report exactly the
+same errors, in the same order.
+
+Each file is read once: its header is checked and its rows validated from
+the same handle.  Several files are linted in parallel across a pool of
+worker processes (--jobs).  Tables that passed are recorded in
+analysis/outputs/.cache/ under the SHA-256 of the table and of the rules
+file, and are skipped until either changes (--no-cache lints everything).
+--max-errors N stops validating a file after N errors (with NumPy, after the
+block of rows holding the Nth error; the first blocks are small).
+
+Usage:
+    python qa/lint_tables.py [TSV ...] [--rules YAML] [--jobs N]
+        [--max-errors N] [--no-cache]
 """
 import argparse
+import concurrent.futures
 import csv
+import hashlib
+import itertools
+import json
 import os
+import re
 import sys
+import time
 import yaml
+from operator import itemgetter
 from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Pattern
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency; rows are then validated one by one
+    np = None
+
+# Rows validated per block by the column-wise path.  Bounds memory use on
+# very large tables; larger blocks mostly add garbage-collector work.
+BLOCK_ROWS = 20_000
+
+# With --max-errors, the first block has this many rows and each next one
+# twice as many (up to BLOCK_ROWS), so a table with early errors stops after
+# validating only a few rows.
+FIRST_BLOCK_ROWS = 1_000
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Record of tables that passed validation (see LintCache).  Kept with the
+# scorer's cache, which is ignored by git.
+CACHE_PATH = REPO_ROOT / "analysis" / "outputs" / ".cache" / "lint_tables_cache.json"
+
+# Maximum number of (table, rules) pairs kept in the cache.
+DEFAULT_CACHE_SIZE = 10_000
+
+# Read files in blocks of this size when hashing.
+HASH_BLOCK_SIZE = 1 << 20
+
+# Error kinds, in the order validate_row() reports them for a cell.
+MISSING, NOT_ALLOWED, NO_MATCH = range(3)
+
+
+class ColumnCheck(NamedTuple):
+    """Compiled rule for one column."""
+
+    column: str
+    allowed: Optional[frozenset]
+    allowed_text: str  # the allowed values as shown in error messages
+    regex: Optional[Pattern]
+    regex_text: str  # the pattern as shown in error messages
 
 
 def load_rules(path: str) -> dict:
@@ -16,52 +82,331 @@ def load_rules(path: str) -> dict:
         return yaml.safe_load(f)
 
 
-def validate_row(row: dict, rules: dict, line_no: int) -> list:
-    """Validate a single TSV row against rules. Returns list of error strings."""
-    errors = []
+def compile_rules(rules: dict) -> list:
+    """Compile validation rules into a plan: one ColumnCheck per column."""
+    plan = []
     for col, rule in rules.get("columns", {}).items():
-        value = row.get(col, "").strip()
-        if not value:
-            # Missing value
-            errors.append(f"Line {line_no}: column '{col}' is missing")
-            continue
-        if "allowed_values" in rule and value not in rule["allowed_values"]:
-            errors.append(
-                f"Line {line_no}: value '{value}' in column '{col}' not in allowed values {rule['allowed_values']}"
+        allowed = rule.get("allowed_values")
+        regex = rule.get("regex")
+        plan.append(
+            ColumnCheck(
+                col,
+                None if allowed is None else frozenset(allowed),
+                str(allowed),
+                None if regex is None else re.compile(regex),
+                str(regex),
             )
-        if "regex" in rule:
-            import re
+        )
+    return plan
+
+
+def error_message(check: ColumnCheck, kind: int, value: str, line_no: int) -> str:
+    """Format one validation error."""
+    col = check.column
+    if kind == MISSING:
+        return f"Line {line_no}: column '{col}' is missing"
+    if kind == NOT_ALLOWED:
+        return f"Line {line_no}: value '{value}' in column '{col}' not in allowed values {check.allowed_text}"
+    return f"Line {line_no}: value '{value}' in column '{col}' does not match pattern {check.regex_text}"
+
+
+def check_value(check: ColumnCheck, value: str) -> list:
+    """Return the error kinds for one stripped cell value."""
+    if not value:
+        return [MISSING]
+    kinds = []
+    if check.allowed is not None and value not in check.allowed:
+        kinds.append(NOT_ALLOWED)
+    if check.regex is not None and not check.regex.match(value):
+        kinds.append(NO_MATCH)
+    return kinds
 
-            if not re.match(rule["regex"], value):
-                errors.append(
-                    f"Line {line_no}: value '{value}' in column '{col}' does not match pattern {rule['regex']}"
-                )
+
+def validate_row(row: dict, plan, line_no: int) -> list:
+    """Validate a single TSV row against rules. Returns list of error strings.
+
+    `plan` is the output of compile_rules(); a rules dict is compiled first.
+    """
+    if isinstance(plan, dict):
+        plan = compile_rules(plan)
+    errors = []
+    for check in plan:
+        value = (row.get(check.column) or "").strip()
+        if value and (check.allowed is None or value in check.allowed) and (
+            check.regex is None or check.regex.match(value)
+        ):
+            continue
+        for kind in check_value(check, value):
+            errors.append(error_message(check, kind, value, line_no))
     return errors
 
 
-def validate_file(file_path: str, rules: dict) -> list:
-    """Validate a TSV file against rules. Returns list of error strings."""
+def read_rows(f) -> Iterator[list]:
+    """Yield the rows of an open TSV file as lists of fields, like csv.reader.
+
+    Lines are split on tabs directly until the first quote character,
+    from where on the csv module takes over (quoted fields may contain
+    tabs and line breaks).
+    """
+    for line in f:
+        if '"' in line:
+            yield from csv.reader(itertools.chain([line], f), delimiter="\t")
+            return
+        yield line.rstrip("\n").split("\t") if line != "\n" else []
+
+
+def validate_block(
+    records: list, index: dict, plan: list, first_line: int, limit: int = 0
+) -> list:
+    """Validate a block of rows column by column. Returns list of error strings.
+
+    `records` are the raw rows, `index` maps column names to positions and
+    `first_line` is the line number of the first row.  Every distinct value
+    of a column is checked once, and only the rows holding an invalid value
+    are picked out.  Errors are sorted by row, column and kind so that they
+    come out in the order validate_row() reports them.  With `limit`, only
+    the first `limit` errors are formatted and returned.
+    """
+    positions = [index.get(check.column) for check in plan]
+    needed = max((pos for pos in positions if pos is not None), default=-1) + 1
+    if min(map(len, records)) < needed:
+        records = [r + [""] * (needed - len(r)) for r in records]
+    found = []
+    for order, (check, pos) in enumerate(zip(plan, positions)):
+        column = [""] * len(records) if pos is None else list(map(itemgetter(pos), records))
+        verdicts = {}
+        for value in dict.fromkeys(column):
+            kinds = check_value(check, value.strip())
+            if kinds:
+                verdicts[value] = kinds
+        if not verdicts:
+            continue
+        mask = np.fromiter(map(verdicts.__contains__, column), dtype=bool, count=len(column))
+        for row in np.flatnonzero(mask).tolist():
+            value = column[row]
+            for kind in verdicts[value]:
+                found.append((row, order, kind, value))
+    found.sort()
+    if limit:
+        del found[limit:]
+    return [
+        error_message(plan[order], kind, value.strip(), first_line + row)
+        for row, order, kind, value in found
+    ]
+
+
+def read_table(f) -> tuple:
+    """Read the header of an open TSV file.
+
+    Returns the header and an iterator over the remaining rows, so that a
+    file is read once from the same handle.
+    """
+    rows = read_rows(f)
+    # As in csv.DictReader, the first line is the header even when blank.
+    header = next(rows, None) or []
+    return header, rows
+
+
+def validate_rows(rows: Iterator[list], header: list, plan: list, max_errors: int = 0) -> list:
+    """Validate the rows following `header`. Returns list of error strings.
+
+    Blank lines are not counted as rows, as in csv.DictReader.  With
+    `max_errors`, validation stops once that many errors have been found:
+    after the row that reaches the limit, or on the column-wise path after
+    the block holding it (see FIRST_BLOCK_ROWS).
+    """
     errors = []
+    rows = (r for r in rows if r)
+    if np is None:
+        for i, r in enumerate(rows, start=2):  # start=2 to account for header line
+            # The last of duplicate columns wins, as in csv.DictReader.
+            errors.extend(validate_row(dict(zip(header, r)), plan, i))
+            if max_errors and len(errors) >= max_errors:
+                break
+    else:
+        index = {col: pos for pos, col in enumerate(header)}
+        line_no = 2
+        block_rows = FIRST_BLOCK_ROWS if max_errors else BLOCK_ROWS
+        while not (max_errors and len(errors) >= max_errors):
+            records = list(itertools.islice(rows, block_rows))
+            if not records:
+                break
+            remaining = max_errors - len(errors) if max_errors else 0
+            errors.extend(validate_block(records, index, plan, line_no, remaining))
+            line_no += len(records)
+            block_rows = min(block_rows * 2, BLOCK_ROWS)
+    return errors[:max_errors] if max_errors else errors
+
+
+def validate_file(file_path: str, plan, max_errors: int = 0) -> list:
+    """Validate a TSV file against rules. Returns list of error strings."""
+    if isinstance(plan, dict):
+        plan = compile_rules(plan)
     with open(file_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter="\t")
-        for i, row in enumerate(reader, start=2):  # start=2 to account for header line
-            errors.extend(validate_row(row, rules, i))
-    return errors
+        header, rows = read_table(f)
+        return validate_rows(rows, header, plan, max_errors)
+
+
+def sha256_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class LintCache:
+    """Persistent record of tables that passed validation.
+
+    A table is skipped while the pair (SHA-256 of the table, SHA-256 of
+    the rules file) is recorded as passed.  The last known size,
+    modification time and digest of each path are kept as well, so
+    unchanged files are not even rehashed.  Least recently used pairs
+    beyond `max_entries` are evicted on save; a missing or unreadable
+    cache file is treated as empty.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_CACHE_SIZE) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.passed: dict = {}  # "<table digest>:<rules digest>" -> last used
+        self.signatures: dict = {}  # path -> [size, mtime_ns, table digest]
+        if path.is_file():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as exc:
+                print(f"Warning: ignoring unreadable cache {path}: {exc}")
+            else:
+                if data.get("version") == self.VERSION:
+                    self.passed = data.get("passed", {})
+                    self.signatures = data.get("signatures", {})
+
+    def digest_hint(self, file_path: Path) -> Optional[str]:
+        """Return the recorded digest of a file if its size and mtime are unchanged."""
+        entry = self.signatures.get(str(file_path))
+        if entry is None:
+            return None
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        return entry[2] if entry[:2] == [stat.st_size, stat.st_mtime_ns] else None
+
+    def passed_digests(self, rules_digest: str) -> frozenset:
+        """Return the digests of the tables that passed the given rules."""
+        suffix = f":{rules_digest}"
+        return frozenset(key[: -len(suffix)] for key in self.passed if key.endswith(suffix))
+
+    def record(self, result: "LintResult", rules_digest: str) -> None:
+        """Remember the digest of a linted file, and mark the pair used if it passed."""
+        if result.digest is None:
+            return
+        self.signatures[result.path] = [result.size, result.mtime_ns, result.digest]
+        if result.status in ("passed", "cached"):
+            self.passed[f"{result.digest}:{rules_digest}"] = time.time()
+
+    def save(self) -> None:
+        """Evict least recently used entries and write the cache atomically."""
+        if len(self.passed) > self.max_entries:
+            keep = sorted(self.passed, key=self.passed.get, reverse=True)[: self.max_entries]
+            self.passed = {key: self.passed[key] for key in keep}
+        self.signatures = {
+            path: entry for path, entry in self.signatures.items() if os.path.exists(path)
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.VERSION, "passed": self.passed, "signatures": self.signatures}, f
+            )
+        os.replace(tmp_path, self.path)
+
+
+class LintTask(NamedTuple):
+    """One table to lint."""
+
+    path: str
+    plan: list
+    required: frozenset  # columns of which at least one must be present
+    max_errors: int
+    digest_hint: Optional[str]  # cached digest if size and mtime are unchanged
+    passed: Optional[frozenset]  # digests that passed the current rules; None: no cache
 
 
-def main():
+class LintResult(NamedTuple):
+    """Outcome of linting one table."""
+
+    path: str
+    status: str  # "passed", "failed", "cached", "skipped" or "unreadable"
+    message: str = ""
+    errors: list = []
+    digest: Optional[str] = None
+    size: int = 0
+    mtime_ns: int = 0
+
+
+def lint_file(task: LintTask) -> LintResult:
+    """Lint one table: skip it if it already passed, else read it in one pass."""
+    digest = None
+    try:
+        stat = os.stat(task.path)
+        if task.passed is not None:
+            digest = task.digest_hint or sha256_file(Path(task.path))
+    except OSError as exc:
+        return LintResult(task.path, "unreadable", str(exc))
+    known = (digest, stat.st_size, stat.st_mtime_ns)
+    if task.passed and digest in task.passed:
+        return LintResult(task.path, "cached", "", [], *known)
+    try:
+        with open(task.path, "r", encoding="utf-8") as f:
+            header, rows = read_table(f)
+            if not task.required.intersection(header):
+                return LintResult(task.path, "skipped")
+            try:
+                errors = validate_rows(rows, header, task.plan, task.max_errors)
+            except Exception as exc:
+                message = f"could not read {task.path} past its header: {exc}"
+                return LintResult(task.path, "failed", message, [], *known)
+    except Exception as exc:
+        return LintResult(task.path, "unreadable", str(exc))
+    return LintResult(task.path, "failed" if errors else "passed", "", errors, *known)
+
+
+def main(argv: Optional[list] = None) -> int:
     parser = argparse.ArgumentParser(description="Validate OA policy tables.")
     parser.add_argument(
         "input",
-        nargs="?",
-        help="TSV file to validate (optional; if omitted, searches analysis/outputs/tables)",
+        nargs="*",
+        help="TSV files to validate (optional; if omitted, searches analysis/outputs/tables)",
     )
     parser.add_argument(
         "--rules",
         default="qa/validation_rules.yaml",
         help="Path to YAML rules file",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of worker processes (default: 0, all CPUs)",
+    )
+    parser.add_argument(
+        "--max-errors",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Stop validating a file after N errors (default: 0, no limit)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Validate every file, even if it already passed with the same rules",
+    )
+    args = parser.parse_args(argv)
     rules_path = args.rules
     # Resolve the default rules path relative to this script if necessary
     if not os.path.exists(rules_path) and rules_path == "qa/validation_rules.yaml":
@@ -70,43 +415,75 @@ def main():
         if candidate.is_file():
             rules_path = str(candidate)
     rules = load_rules(rules_path)
+    plan = compile_rules(rules)
     # Determine which files to validate
     if args.input:
-        target_files = [Path(args.input)]
+        target_files = [Path(p) for p in args.input]
     else:
-        repo_root = Path(__file__).resolve().parents[1]
-        search_dir = repo_root / "analysis" / "outputs" / "tables"
+        search_dir = REPO_ROOT / "analysis" / "outputs" / "tables"
         if search_dir.is_dir():
-            target_files = list(search_dir.glob("*.tsv"))
+            target_files = sorted(search_dir.glob("*.tsv"))
         else:
             target_files = []
         if not target_files:
             print("No TSV files found for validation. Skipping lint and exiting successfully.")
-            return
+            return 0
+
+    cache = None if args.no_cache else LintCache(CACHE_PATH)
+    rules_digest = sha256_file(Path(rules_path))
+    passed = cache.passed_digests(rules_digest) if cache else None
+    required_columns = frozenset(rules.get("columns", {}).keys())
+    tasks = [
+        LintTask(
+            str(file_path),
+            plan,
+            required_columns,
+            args.max_errors,
+            cache.digest_hint(file_path) if cache else None,
+            passed,
+        )
+        for file_path in target_files
+    ]
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if jobs <= 1 or len(tasks) <= 1:
+        results = map(lint_file, tasks)
+        pool = None
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(tasks)))
+        results = pool.map(lint_file, tasks)
+
     return_code = 0
-    required_columns = set(rules.get("columns", {}).keys())
-    for file_path in target_files:
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                reader = csv.reader(f, delimiter="\t")
-                header = next(reader, [])
-        except Exception as exc:
-            print(f"Warning: could not read {file_path}: {exc}")
-            continue
-        if not required_columns.intersection(header):
-            print(f"Skipping {file_path} – no required columns for validation found.")
-            continue
-        print(f"Validating {file_path} using rules from {args.rules}")
-        errors = validate_file(str(file_path), rules)
-        if errors:
-            print(f"Errors found in {file_path}:")
-            for err in errors:
-                print(err)
-            return_code = 1
-        else:
-            print(f"No errors found in {file_path}.")
-    sys.exit(return_code)
+    try:
+        for result in results:
+            file_path = result.path
+            if cache is not None:
+                cache.record(result, rules_digest)
+            if result.status == "unreadable":
+                print(f"Warning: could not read {file_path}: {result.message}")
+            elif result.status == "skipped":
+                print(f"Skipping {file_path} – no required columns for validation found.")
+            elif result.status == "cached":
+                print(f"No errors found in {file_path} (unchanged since it last passed).")
+            else:
+                print(f"Validating {file_path} using rules from {args.rules}")
+                if result.status == "failed":
+                    print(f"Errors found in {file_path}:")
+                    for err in result.errors:
+                        print(err)
+                    if result.message:
+                        print(f"Error: {result.message}")
+                    elif args.max_errors and len(result.errors) >= args.max_errors:
+                        print(f"Stopped after {args.max_errors} errors.")
+                    return_code = 1
+                else:
+                    print(f"No errors found in {file_path}.")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if cache is not None:
+        cache.save()
+    return return_code
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Tests of the checksum check in analysis/scripts/pdf_to_text.py.
+
+Run with ``python -m unittest discover tests`` from the repository root.
+"""
+
+import hashlib
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "analysis" / "scripts"))
+
+from pdf_to_text import Task, process_task  # noqa: E402
+
+STALE = "0" * 64
+
+
+class ChecksumSourcesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        self.pdf_path = root / "DE_RPO_99_Test_2024.pdf"
+        self.pdf_path.write_bytes(b"%PDF-1.4 test")
+        self.checksum = hashlib.sha256(b"%PDF-1.4 test").hexdigest()
+        self.text_path = root / "DE_RPO_99_Test_2024.txt"
+        self.text_path.write_text("extracted\f", encoding="utf-8")
+
+    def run_task(self, manifest, metadata):
+        # dry_run: a PDF to be extracted is reported, not extracted.
+        return process_task(
+            Task(self.pdf_path, self.text_path, manifest, metadata, False, True)
+        )
+
+    def test_manifest_match_is_unchanged(self) -> None:
+        outcome = self.run_task(self.checksum, None)
+        self.assertEqual((outcome.status, outcome.checksum), ("skipped", None))
+
+    def test_stale_manifest_with_matching_metadata_is_skipped_and_corrected(self) -> None:
+        outcome = self.run_task(STALE, self.checksum)
+        self.assertEqual(outcome.status, "skipped")
+        # Returned so that main() replaces the stale manifest entry.
+        self.assertEqual(outcome.checksum, self.checksum)
+
+    def test_metadata_without_manifest_entry_is_skipped(self) -> None:
+        outcome = self.run_task(None, self.checksum)
+        self.assertEqual(outcome.status, "skipped")
+
+    def test_changed_pdf_is_extracted(self) -> None:
+        self.assertEqual(self.run_task(STALE, STALE).status, "extracted")
+        self.assertEqual(self.run_task(STALE, None).status, "extracted")
+        self.assertEqual(self.run_task(None, STALE).status, "extracted")
+
+    def test_text_without_checksums_is_left_alone(self) -> None:
+        self.assertEqual(self.run_task(None, None).status, "skipped")
+
+
+if __name__ == "__main__":
+    unittest.main()